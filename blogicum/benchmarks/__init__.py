@@ -0,0 +1,3 @@
+# Нагрузочные замеры для команд benchmark_* и stress_sqlite
+# Пакет лежит вне приложения blog: тестовый клиент Django и Faker
+# не импортируются кодом, который работает на сайте
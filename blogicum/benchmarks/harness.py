@@ -0,0 +1,483 @@
+# Нагрузочный замер страниц блога
+# seed_dataset заполняет базу синтетическими данными (Faker, bulk_create),
+# collect_targets строит адреса всех маршрутов blog и pages по этим данным,
+# run_target прогоняет адрес через WSGI-приложение в нескольких потоках
+# и считает перцентили задержки, запросы в секунду и SQL на запрос
+# run_write_stress одновременно создаёт публикации и комментарии и читает
+# ленту, считая ошибки блокировки базы
+# measure_render замеряет время рендеринга шаблонов страницы по заголовку
+# Server-Timing: первый запрос отдельно от остальных
+# measure_changelist замеряет время, SQL-запросы и размер страницы списка
+# админки: они должны зависеть от list_per_page, а не от размера таблиц
+
+import copy
+import math
+import multiprocessing
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import OperationalError, connection
+from django.test import Client
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from faker import Faker
+
+from blog.counts import actual_comment_count
+from blog.models import Category, Comment, Location, Post, User
+from blog.pagination import CURSOR_PARAM
+from blog.search import rebuild_index
+from blog.visibility import sync_visibility
+
+BATCH_SIZE = 1000
+SERVER_TIMING_TEMPLATE = re.compile(r'\btpl;dur=([\d.]+)')
+FILE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+BENCH_PASSWORD = 'benchmark-password'
+BENCHMARKED_APPS = ('blog', 'pages')
+
+
+@dataclass
+class Dataset:
+    users: int = 50
+    categories: int = 10
+    locations: int = 20
+    posts: int = 2000
+    comments: int = 10000
+    seed: int = 0
+
+
+@dataclass
+class Target:
+    name: str
+    url: str
+    authenticated: bool
+
+
+@dataclass
+class Result:
+    url: str
+    requests: int
+    errors: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    rps: float
+    queries: float
+    statuses: dict = field(default_factory=dict)
+
+
+@dataclass
+class StressResult:
+    requests: int
+    writes: int
+    lock_errors: int
+    errors: int
+    seconds: float
+    rps: float
+
+
+def seed_dataset(dataset):
+    """
+    Заполняет базу; возвращает автора, от имени которого открываются
+    закрытые страницы
+    """
+    fake = Faker('ru_RU')
+    Faker.seed(dataset.seed)
+    rng = random.Random(dataset.seed)
+    now = timezone.now()
+
+    User.objects.bulk_create(
+        [User(username=f'bench_{index}', email=fake.email())
+         for index in range(dataset.users)],
+        batch_size=BATCH_SIZE
+    )
+    users = list(User.objects.filter(username__startswith='bench_'))
+    Category.objects.bulk_create(
+        [Category(title=fake.sentence(nb_words=2)[:256],
+                  description=fake.text(max_nb_chars=200),
+                  slug=f'bench-{index}',
+                  is_published=index % 10 != 9)
+         for index in range(dataset.categories)],
+        batch_size=BATCH_SIZE
+    )
+    categories = list(Category.objects.filter(slug__startswith='bench-'))
+    Location.objects.bulk_create(
+        [Location(name=fake.city()) for _ in range(dataset.locations)],
+        batch_size=BATCH_SIZE
+    )
+    locations = list(Location.objects.all())
+
+    for start in range(0, dataset.posts, BATCH_SIZE):
+        Post.objects.bulk_create([
+            Post(
+                title=fake.sentence(nb_words=5)[:256],
+                text=fake.text(max_nb_chars=1000),
+                # Каждая двадцатая публикация отложена, каждая десятая скрыта
+                pub_date=now + timedelta(minutes=rng.randint(-10 ** 6, 0))
+                if index % 20 else now + timedelta(days=rng.randint(1, 30)),
+                is_published=index % 10 != 0,
+                author=rng.choice(users),
+                category=rng.choice(categories),
+                location=rng.choice(locations),
+            )
+            for index in range(start, min(start + BATCH_SIZE, dataset.posts))
+        ])
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+
+    for start in range(0, dataset.comments, BATCH_SIZE):
+        Comment.objects.bulk_create([
+            Comment(
+                text=fake.text(max_nb_chars=200),
+                author=rng.choice(users),
+                post_id=rng.choice(post_ids),
+            )
+            for _ in range(start, min(start + BATCH_SIZE, dataset.comments))
+        ])
+
+    Post.objects.update(comment_count=actual_comment_count())
+    sync_visibility()
+    rebuild_index()
+
+    author = users[0]
+    author.set_password(BENCH_PASSWORD)
+    author.save()
+    return author
+
+
+def _iter_patterns(resolver, namespace=None):
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _iter_patterns(
+                pattern, pattern.namespace or namespace
+            )
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield namespace, pattern
+
+
+def collect_targets(author):
+    """
+    Адреса всех именованных маршрутов blog и pages; параметры берутся из
+    данных автора, маршруты с неизвестными параметрами пропускаются
+    """
+    post = (
+        Post.objects.filter(author=author, is_visible=True)
+        .order_by('-comment_count').first()
+    )
+    if post is None:
+        raise ValueError('В наборе данных нет опубликованных постов автора')
+    comment = Comment.objects.create(
+        post=post, author=author, text='Комментарий для замера'
+    )
+    values = {
+        'post_id': comment.post_id,
+        'comment_id': comment.pk,
+        'category_slug': post.category.slug,
+        'username': author.username,
+    }
+
+    targets = []
+    for namespace, pattern in _iter_patterns(get_resolver()):
+        if namespace not in BENCHMARKED_APPS:
+            continue
+        params = list(pattern.pattern.converters)
+        if not set(params) <= set(values):
+            continue
+        url = reverse(
+            f'{namespace}:{pattern.name}',
+            kwargs={param: values[param] for param in params}
+        )
+        view_class = getattr(pattern.callback, 'view_class', None)
+        login_required = bool(
+            view_class and issubclass(view_class, LoginRequiredMixin)
+        )
+        name = f'{namespace}:{pattern.name}'
+        targets.append(Target(name, url, authenticated=True))
+        if not login_required:
+            targets.append(
+                Target(f'{name} (anonymous)', url, authenticated=False)
+            )
+
+    # Глубокие страницы лент: по номеру и по курсору
+    index = reverse('blog:index')
+    targets.append(Target('blog:index ?page=last', f'{index}?page=last',
+                          authenticated=False))
+    targets.append(Target('blog:index ?cursor=', f'{index}?{CURSOR_PARAM}=',
+                          authenticated=False))
+    return targets
+
+
+def percentile(samples, percent):
+    """Перцентиль методом ближайшего ранга"""
+    ordered = sorted(samples)
+    rank = math.ceil(percent / 100 * len(ordered)) - 1
+    return ordered[max(0, min(rank, len(ordered) - 1))]
+
+
+def _make_clients(count, author):
+    clients = []
+    for _ in range(count):
+        # Ошибки 5xx попадают в отчёт, а не прерывают замер
+        client = Client(raise_request_exception=False)
+        if author is not None:
+            client.force_login(author)
+        clients.append(client)
+    return clients
+
+
+def run_target(target, author, requests=100, concurrency=4, warmup=2):
+    """Прогоняет адрес requests раз в concurrency потоках"""
+    clients = _make_clients(
+        concurrency, author if target.authenticated else None
+    )
+    per_client = [requests // concurrency] * concurrency
+    for index in range(requests % concurrency):
+        per_client[index] += 1
+
+    def work(client, count):
+        samples, statuses, queries = [], {}, 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        try:
+            for _ in range(warmup):
+                client.get(target.url)
+            with connection.execute_wrapper(count_queries):
+                for _ in range(count):
+                    start = time.perf_counter()
+                    response = client.get(target.url)
+                    samples.append(time.perf_counter() - start)
+                    statuses[response.status_code] = (
+                        statuses.get(response.status_code, 0) + 1
+                    )
+        finally:
+            connection.close()
+        return samples, statuses, queries
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        chunks = list(pool.map(work, clients, per_client))
+    elapsed = time.perf_counter() - started
+
+    samples = [sample for chunk, _, _ in chunks for sample in chunk]
+    statuses = {}
+    for _, chunk_statuses, _ in chunks:
+        for status, count in chunk_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+    total_queries = sum(queries for _, _, queries in chunks)
+    return Result(
+        url=target.url,
+        requests=len(samples),
+        errors=sum(
+            count for status, count in statuses.items() if status >= 500
+        ),
+        p50_ms=round(percentile(samples, 50) * 1000, 3),
+        p95_ms=round(percentile(samples, 95) * 1000, 3),
+        p99_ms=round(percentile(samples, 99) * 1000, 3),
+        rps=round(len(samples) / elapsed, 1),
+        queries=round(total_queries / len(samples), 2),
+        statuses={str(status): count for status, count in statuses.items()},
+    )
+
+
+def compare(results, baseline, threshold=0.2):
+    """
+    Список регрессий относительно сохранённого прогона: рост p95 или
+    падение RPS больше порога, а также рост числа SQL-запросов
+    """
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if result['p95_ms'] > old['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f'{name}: p95 {old["p95_ms"]} -> {result["p95_ms"]} мс'
+            )
+        if result['rps'] < old['rps'] * (1 - threshold):
+            regressions.append(f'{name}: RPS {old["rps"]} -> {result["rps"]}')
+        if result['queries'] > old['queries']:
+            regressions.append(
+                f'{name}: SQL {old["queries"]} -> {result["queries"]}'
+            )
+    return regressions
+
+
+def _stress_request(client, writer, index, urls, post_data):
+    """Писатель чередует публикации и комментарии, читатель — страницы"""
+    if not writer:
+        return client.get(urls['read'][index % len(urls['read'])])
+    if index % 2:
+        return client.post(urls['comment'], {'text': f'Комментарий {index}'})
+    return client.post(urls['create'], post_data)
+
+
+# Состояние нагрузочного прогона, унаследованное процессами через fork
+_stress_state = {}
+
+
+def _stress_worker(client, writer, requests, urls, post_data):
+    counts = {'requests': 0, 'writes': 0, 'locked': 0, 'errors': 0}
+    try:
+        for index in range(requests):
+            counts['requests'] += 1
+            try:
+                response = _stress_request(
+                    client, writer, index, urls, post_data
+                )
+            except OperationalError as error:
+                counts['locked' if 'locked' in str(error) else 'errors'] += 1
+                continue
+            if response.status_code >= 400:
+                counts['errors'] += 1
+            elif writer:
+                counts['writes'] += 1
+    finally:
+        connection.close()
+    return counts
+
+
+def _stress_process(index):
+    state = _stress_state
+    return _stress_worker(
+        state['clients'][index], state['roles'][index], state['requests'],
+        state['urls'], state['post_data']
+    )
+
+
+def run_write_stress(author, post, writers=4, readers=4, requests=50,
+                     processes=False):
+    """
+    Писатели создают публикации и комментарии к post, читатели открывают
+    ленту и страницу post; каждый поток выполняет requests запросов
+    С processes=True клиенты работают в отдельных процессах, как воркеры
+    WSGI-сервера, и не делят GIL и соединения с базой
+    """
+    urls = {
+        'create': reverse('blog:create_post'),
+        'comment': reverse('blog:add_comment', args=[post.pk]),
+        'read': [reverse('blog:index'),
+                 reverse('blog:post_detail', args=[post.pk])],
+    }
+    post_data = {
+        'title': 'Нагрузочный тест',
+        'text': 'Текст публикации',
+        'pub_date': timezone.now().strftime('%Y-%m-%d %H:%M'),
+        'category': post.category_id or '',
+        'location': post.location_id or '',
+        'is_published': 'on',
+    }
+    clients = [Client() for _ in range(writers + readers)]
+    for client in clients[:writers]:
+        client.force_login(author)
+    roles = [True] * writers + [False] * readers
+
+    started = time.perf_counter()
+    if processes and 'fork' in multiprocessing.get_all_start_methods():
+        _stress_state.update(clients=clients, roles=roles, requests=requests,
+                             urls=urls, post_data=post_data)
+        # Дочерние процессы открывают собственные соединения
+        connection.close()
+        with multiprocessing.get_context('fork').Pool(len(clients)) as pool:
+            chunks = pool.map(_stress_process, range(len(clients)))
+        _stress_state.clear()
+    else:
+        with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+            chunks = list(pool.map(
+                lambda client, writer: _stress_worker(
+                    client, writer, requests, urls, post_data
+                ),
+                clients, roles
+            ))
+    elapsed = time.perf_counter() - started
+    total = sum(chunk['requests'] for chunk in chunks)
+    return StressResult(
+        requests=total,
+        writes=sum(chunk['writes'] for chunk in chunks),
+        lock_errors=sum(chunk['locked'] for chunk in chunks),
+        errors=sum(chunk['errors'] for chunk in chunks),
+        seconds=round(elapsed, 3),
+        rps=round(total / elapsed, 1),
+    )
+
+
+def template_settings(base, cached):
+    """Копия TEMPLATES с явными загрузчиками, с кэшем или без"""
+    templates = copy.deepcopy(base)
+    for engine in templates:
+        engine['APP_DIRS'] = False
+        engine.setdefault('OPTIONS', {})['loaders'] = (
+            [('django.template.loaders.cached.Loader', FILE_LOADERS)]
+            if cached else list(FILE_LOADERS)
+        )
+    return templates
+
+
+def measure_render(target, author, requests=20):
+    """
+    Время рендеринга шаблонов первого запроса и среднее по остальным, мс;
+    None, если страница не отрисовывает шаблон
+    """
+    client = _make_clients(1, author if target.authenticated else None)[0]
+    samples = []
+    for _ in range(requests):
+        match = SERVER_TIMING_TEMPLATE.search(
+            client.get(target.url).get('Server-Timing', '')
+        )
+        if match is None:
+            return None
+        samples.append(float(match.group(1)))
+    if not any(samples):
+        return None
+    rest = samples[1:] or samples
+    return {
+        'first_ms': samples[0],
+        'mean_ms': round(sum(rest) / len(rest), 3),
+    }
+
+
+def make_admin(author):
+    """Даёт автору права суперпользователя для замеров админки"""
+    author.is_staff = author.is_superuser = True
+    author.save(update_fields=['is_staff', 'is_superuser'])
+    return author
+
+
+def measure_changelist(url, admin, requests=10):
+    """
+    Среднее время ответа (мс), число SQL-запросов и размер (КБ) страницы
+    админки; первый запрос не учитывается
+    """
+    client = _make_clients(1, admin)[0]
+    client.get(url)
+    samples, queries, size = [], 0, 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_queries):
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.get(url)
+            samples.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise ValueError(
+                    f'{url}: статус ответа {response.status_code}'
+                )
+            size = len(response.content)
+    return {
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+        'queries': round(queries / requests, 2),
+        'kb': round(size / 1024, 1),
+    }
@@ -1,12 +1,276 @@
-from django.contrib import admin
+# Админка блога
+# Внешние ключи в списках и формах выбираются автодополнением (категории,
+# местоположения, публикации) или по id (пользователи), а не полным
+# <select> всех строк связанной таблицы. Связанные объекты строк списка
+# загружаются одним запросом (list_select_related), и виджеты
+# list_editable берут выбранный объект из строки, а не запросом на строку
+# Поиск публикаций, в том числе для автодополнения, идёт по
+# полнотекстовому индексу (blog/search.py), а не LIKE '%...%'
+# Комментарии ищутся по имени автора (точно или по началу — диапазоном
+# по индексу username) и по словам текста; навигация по датам проверяет
+# периоды запросами по индексу created_at, а не DISTINCT по всей таблице
+# Фильтр публикаций по автору — поле для имени пользователя вместо
+# списка всех пользователей
+# Действия списков (публикация, снятие с публикации, перенос в категорию
+# и удаление) выполняются порциями UPDATE и DELETE (blog/moderation.py)
+# вместо сохранения и удаления объектов по одному
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.views.main import PAGE_VAR
+from django.contrib.admin.widgets import (
+    AutocompleteSelect, ForeignKeyRawIdWidget
+)
+from django.core.exceptions import ValidationError
+from django.db.models import Max, Min, Q, QuerySet
+from django.template.response import TemplateResponse
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from django.utils.text import Truncator
 
 # Register your models here.
-from .models import Category, Location, Post, Comment
+from . import moderation
+from .models import Category, Location, Post, Comment, User
+from .search import comment_text_q, filter_matching
 
 admin.site.empty_value_display = 'Не задано'
 
+# Строк на странице списка: от него зависит время отрисовки, а не от
+# размера таблиц
+LIST_PER_PAGE = 50
+# Поля запроса списка, которые страница подтверждения удаления передаёт
+# обратно вместе с подтверждением
+ACTION_POST_FIELDS = (
+    'action', 'index', 'select_across', admin.helpers.ACTION_CHECKBOX_NAME
+)
+# Больше любого символа: username__lt=prefix + PREFIX_END задаёт
+# диапазон имён, начинающихся с prefix
+PREFIX_END = chr(0x10FFFF)
+
+
+def next_period(start, kind):
+    """Начало следующего года или месяца"""
+    if kind == 'year':
+        return start.replace(year=start.year + 1)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+class IndexedDatesQuerySet(QuerySet):
+    """
+    Годы и месяцы для date_hierarchy находятся проверкой каждого периода
+    между MIN и MAX поля (поиск по индексу), а не DISTINCT по усечённым
+    датам всех строк
+    """
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None,
+                  **kwargs):
+        if kind not in ('year', 'month'):
+            return super().datetimes(
+                field_name, kind, order, tzinfo, **kwargs
+            )
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if bounds['first'] is None:
+            return []
+        zone = tzinfo or timezone.get_current_timezone()
+        first = timezone.localtime(bounds['first'], zone)
+        last = timezone.localtime(bounds['last'], zone)
+        start = first.replace(
+            month=1 if kind == 'year' else first.month,
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+        periods = []
+        while start <= last:
+            end = next_period(start, kind)
+            if self.filter(**{
+                f'{field_name}__gte': start, f'{field_name}__lt': end
+            }).exists():
+                periods.append(start)
+            start = end
+        return periods if order == 'ASC' else periods[::-1]
+
+
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    """Автодополнение, которое выводит уже загруженный выбранный объект"""
+
+    preloaded = None
+
+    def optgroups(self, name, value, attr=None):
+        obj = self.preloaded
+        selected = [str(item) for item in value if item not in ('', None)]
+        if obj is None or selected != [str(obj.pk)]:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        options.append(self.create_option(
+            name, obj.pk, self.choices.field.label_from_instance(obj),
+            True, len(options)
+        ))
+        return [(None, options, 0)]
+
+
+class PreloadedRawIdWidget(ForeignKeyRawIdWidget):
+    """Поле id, подпись которого берётся из уже загруженного объекта"""
+
+    preloaded = None
+
+    def label_and_url_for_value(self, value):
+        obj = self.preloaded
+        if obj is None or str(obj.pk) != str(value):
+            return super().label_and_url_for_value(value)
+        opts = obj._meta
+        try:
+            url = reverse(
+                f'{self.admin_site.name}:{opts.app_label}_'
+                f'{opts.model_name}_change', args=(obj.pk,)
+            )
+        except NoReverseMatch:
+            url = ''
+        return Truncator(obj).words(14), url
+
+
+class PreloadedWidgetsMixin:
+    """
+    Внешние ключи из autocomplete_fields и raw_id_fields в list_editable
+    выводят объект, загруженный list_select_related, без запроса на
+    каждую строку списка
+    """
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        using = kwargs.get('using')
+        if 'widget' not in kwargs:
+            if db_field.name in self.get_autocomplete_fields(request):
+                kwargs['widget'] = PreloadedAutocompleteSelect(
+                    db_field, self.admin_site, using=using
+                )
+            elif db_field.name in self.raw_id_fields:
+                kwargs['widget'] = PreloadedRawIdWidget(
+                    db_field.remote_field, self.admin_site, using=using
+                )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_formset(self, request, **kwargs):
+        formset = super().get_changelist_formset(request, **kwargs)
+
+        class PreloadedFormSet(formset):
+            def _construct_form(self, i, **kwargs):
+                form = super()._construct_form(i, **kwargs)
+                for name, field in form.fields.items():
+                    # RelatedFieldWidgetWrapper хранит виджет в .widget
+                    widget = getattr(field.widget, 'widget', field.widget)
+                    if hasattr(widget, 'preloaded'):
+                        widget.preloaded = getattr(form.instance, name)
+                return form
+
+        return PreloadedFormSet
+
+
+class BulkModerationMixin:
+    """
+    Действия массовой модерации; удаление порциями заменяет
+    delete_selected, который загружает и удаляет объекты по одному
+    """
+
+    actions = ('delete_in_batches',)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(
+        description='Опубликовать выбранные', permissions=('change',)
+    )
+    def publish_selected(self, request, queryset):
+        count = moderation.set_published(request.user, queryset, True)
+        self.message_user(request, f'Опубликовано: {count}', messages.SUCCESS)
+
+    @admin.action(
+        description='Снять с публикации выбранные', permissions=('change',)
+    )
+    def unpublish_selected(self, request, queryset):
+        count = moderation.set_published(request.user, queryset, False)
+        self.message_user(
+            request, f'Снято с публикации: {count}', messages.SUCCESS
+        )
+
+    @admin.action(description='Удалить выбранные', permissions=('delete',))
+    def delete_in_batches(self, request, queryset):
+        if request.POST.get('post') != 'yes':
+            opts = self.model._meta
+            return TemplateResponse(
+                request, 'admin/blog/bulk_delete_confirmation.html', {
+                    **self.admin_site.each_context(request),
+                    'title': 'Удаление',
+                    'opts': opts,
+                    'count': queryset.count(),
+                    'cascade': self.model is Post,
+                    'hidden_fields': [
+                        (name, value) for name in ACTION_POST_FIELDS
+                        for value in request.POST.getlist(name)
+                    ],
+                }
+            )
+        count = moderation.delete(request.user, queryset)
+        self.message_user(request, f'Удалено: {count}', messages.SUCCESS)
+
+
+class AuthorListFilter(admin.SimpleListFilter):
+    """
+    Фильтр по имени автора, введённому в поле: строка списка фильтра не
+    выводит всех пользователей, а отбор идёт по индексу username
+    """
+
+    title = 'автор'
+    parameter_name = 'author'
+    template = 'admin/blog/author_filter.html'
+
+    def lookups(self, request, model_admin):
+        value = self.value()
+        return [(value, value)] if value else []
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(author__username=self.value())
+        return queryset
+
+    def choices(self, changelist):
+        yield {
+            'value': self.value() or '',
+            'parameter_name': self.parameter_name,
+            'query_string': changelist.get_query_string(
+                remove=[self.parameter_name]
+            ),
+            # Остальные фильтры и поиск сохраняются при отправке формы
+            'hidden_fields': [
+                (name, value) for name, value in changelist.params.items()
+                if name not in (self.parameter_name, PAGE_VAR)
+            ],
+        }
+
+
+class PostActionForm(ActionForm):
+    """
+    Форма действий списка публикаций с выбором категории переноса;
+    категория ищется автодополнением, а не выбирается из всех категорий
+    """
 
-class PostAdmin(admin.ModelAdmin):
+    category = forms.ModelChoiceField(
+        Category.objects.all(), required=False, label='Категория',
+        widget=AutocompleteSelect(
+            Post._meta.get_field('category'), admin.site
+        )
+    )
+
+
+class PostAdmin(PreloadedWidgetsMixin, BulkModerationMixin,
+                admin.ModelAdmin):
     list_display = (
         'title',
         'pub_date',
@@ -22,11 +286,56 @@ class PostAdmin(admin.ModelAdmin):
         'location'
     )
     search_fields = ('title',)
-    list_filter = ('category', 'author', 'created_at',)
+    list_filter = (AuthorListFilter, 'category', 'created_at',)
     list_display_links = ('title',)
+    list_select_related = ('author', 'location', 'category')
+    list_per_page = LIST_PER_PAGE
+    # Без COUNT(*) по всей таблице при поиске и фильтрации
+    show_full_result_count = False
+    autocomplete_fields = ('category', 'location')
+    raw_id_fields = ('author',)
+    action_form = PostActionForm
+    actions = (
+        'publish_selected', 'unpublish_selected', 'move_to_category',
+        'delete_in_batches',
+    )
+
+    @admin.action(
+        description='Перенести выбранные в категорию',
+        permissions=('change',)
+    )
+    def move_to_category(self, request, queryset):
+        try:
+            category = PostActionForm.base_fields['category'].clean(
+                request.POST.get('category')
+            )
+        except ValidationError:
+            category = None
+        if category is None:
+            self.message_user(
+                request, 'Выберите категорию для переноса.', messages.ERROR
+            )
+            return
+        count = moderation.move_posts(request.user, queryset, category)
+        self.message_user(
+            request, f'Перенесено в «{category.title}»: {count}',
+            messages.SUCCESS
+        )
 
+    def get_queryset(self, request):
+        """Связанные объекты нужны Post.__str__ в автодополнении"""
+        return super().get_queryset(request).select_related(
+            'author', 'location', 'category'
+        )
 
-class CategoryAdmin(admin.ModelAdmin):
+    def get_search_results(self, request, queryset, search_term):
+        """Слова заголовка и текста ищутся по полнотекстовому индексу"""
+        if not search_term.strip():
+            return queryset, False
+        return filter_matching(queryset, search_term), False
+
+
+class CategoryAdmin(BulkModerationMixin, admin.ModelAdmin):
     list_display = (
         'title',
         'is_published'
@@ -35,9 +344,10 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ('title',)
     list_filter = ('title',)
     list_display_links = ('title',)
+    actions = ('publish_selected', 'unpublish_selected', 'delete_in_batches')
 
 
-class LocationAdmin(admin.ModelAdmin):
+class LocationAdmin(BulkModerationMixin, admin.ModelAdmin):
     list_display = (
         'name',
         'is_published'
@@ -46,13 +356,49 @@ class LocationAdmin(admin.ModelAdmin):
     search_fields = ('name',)
     list_filter = ('name', 'created_at',)
     list_display_links = ('name',)
+    actions = ('publish_selected', 'unpublish_selected', 'delete_in_batches')
 
 
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ('text', 'author', 'post',)
+class CommentAdmin(PreloadedWidgetsMixin, BulkModerationMixin,
+                   admin.ModelAdmin):
+    list_display = ('text', 'author', 'post', 'created_at')
     list_editable = ('author', 'post', )
-    search_fields = ('author',)
+    # Поиск выполняет get_search_results; поля нужны для строки поиска
+    search_fields = ('author__username', 'text')
+    search_help_text = (
+        'Имя автора целиком или его начало (с учётом регистра)'
+        ' либо слова из текста комментария'
+    )
+    date_hierarchy = 'created_at'
     list_display_links = ('text',)
+    list_select_related = (
+        'author', 'post__author', 'post__location', 'post__category'
+    )
+    list_per_page = LIST_PER_PAGE
+    show_full_result_count = False
+    autocomplete_fields = ('post',)
+    raw_id_fields = ('author',)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return IndexedDatesQuerySet(
+            model=queryset.model, query=queryset.query, using=queryset.db
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Автор — диапазоном по уникальному индексу username, текст — по
+        полнотекстовому индексу комментариев
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        authors = User.objects.filter(
+            username__gte=term, username__lt=term + PREFIX_END
+        ).values('pk')
+        return queryset.filter(
+            Q(author__in=authors) | comment_text_q(term, queryset.db)
+        ), False
 
 
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,238 @@
+# JSON API только для чтения: ленты (главная, категория, профиль),
+# страница публикации и следующие страницы её комментариев
+# Видимость и порядок те же, что у HTML-представлений (blog/views.py),
+# пагинация курсорная (?cursor=), как у главной ленты и комментариев
+# Ответ сериализуется один раз и хранится в кэше страниц вместе со
+# строгим ETag (хэш тела) и Last-Modified: самой новой строкой результата,
+# но не раньше последнего изменения данных (blog/cache.py). Условный
+# запрос с совпавшим ETag или не более старой датой получает
+# 304 Not Modified из кэша, без запросов к базе и сериализации
+
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.generic import View
+
+from .cache import (
+    get_generation, get_page_cache, last_change_time, page_cache_key,
+    replica_may_lag
+)
+from .models import Category, User
+from .pagination import CURSOR_PARAM, CursorPaginator, InvalidCursor
+from .views import (
+    FEED_ORDERING, PAGINATOR_CATEGORY, PAGINATOR_POST, PAGINATOR_PROFILE,
+    ScheduledPublishingMixin, get_comments_page, get_posts_with_comments,
+    get_visible_post
+)
+
+CONTENT_TYPE = 'application/json'
+
+
+def post_time(post, now):
+    """Время появления публикации: создание или наступление pub_date"""
+    return max(
+        post.created_at.timestamp(), min(post.pub_date.timestamp(), now)
+    )
+
+
+def serialize_post(post):
+    category, location = post.category, post.location
+    return {
+        'id': post.pk,
+        'title': post.title,
+        'text': post.text,
+        'pub_date': post.pub_date,
+        'author': post.author.get_username(),
+        'category': {'slug': category.slug, 'title': category.title}
+        if category else None,
+        'location': location.name
+        if location and location.is_published else None,
+        'image': post.image.url if post.image else None,
+        'comment_count': post.comment_count,
+        'is_visible': post.is_visible,
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'author': comment.author.get_username(),
+        'text': comment.text,
+        'created_at': comment.created_at,
+    }
+
+
+def serialize_page(page, items):
+    return {
+        'results': items,
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+class ConditionalJsonMixin:
+    """
+    Отдаёт JSON с валидаторами ETag и Last-Modified; тело и валидаторы
+    берутся из кэша страниц, пока не изменились данные блога
+    Данные ответа строит функция, которую представление передаёт
+    в json_response: она возвращает данные и время (timestamp) самой
+    новой строки
+    """
+
+    replica_reads = True
+
+    def get_viewer(self):
+        """Часть ключа кэша для ответов, зависящих от пользователя"""
+        return 'public'
+
+    def build_entry(self, build_payload):
+        payload, newest = build_payload()
+        body = json.dumps(
+            payload, cls=DjangoJSONEncoder, ensure_ascii=False,
+            separators=(',', ':')
+        ).encode()
+        changed = last_change_time()
+        return {
+            'body': body,
+            'etag': f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            'last_modified': int(max(
+                newest or 0, changed if changed is not None else time.time()
+            )),
+        }
+
+    def get_entry(self, build_payload):
+        timeout = getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', 0)
+        if not timeout:
+            return self.build_entry(build_payload)
+        cache = get_page_cache()
+        key = page_cache_key(
+            self.request, get_generation(cache),
+            kind=f'api:{self.get_viewer()}'
+        )
+        entry = cache.get(key)
+        if entry is None:
+            entry = self.build_entry(build_payload)
+            if not replica_may_lag():
+                cache.set(key, entry, timeout)
+        return entry
+
+    def json_response(self, build_payload):
+        try:
+            entry = self.get_entry(build_payload)
+        except Http404 as error:
+            return JsonResponse({'detail': str(error) or 'Не найдено'},
+                                status=404)
+        response = get_conditional_response(
+            self.request, etag=entry['etag'],
+            last_modified=entry['last_modified']
+        )
+        if response is None:
+            response = HttpResponse(entry['body'], content_type=CONTENT_TYPE)
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(entry['last_modified'])
+        return response
+
+
+class FeedApiView(ScheduledPublishingMixin, ConditionalJsonMixin, View):
+    """Лента публикаций по курсору, как главная лента в курсорном режиме"""
+
+    paginate_by = PAGINATOR_POST
+
+    def get_queryset(self):
+        return get_posts_with_comments()
+
+    def get(self, request, *args, **kwargs):
+        return self.json_response(self.feed_payload)
+
+    def feed_payload(self):
+        paginator = CursorPaginator(
+            self.get_queryset(), self.paginate_by, ordering=FEED_ORDERING
+        )
+        try:
+            page = paginator.get_page(self.request.GET.get(CURSOR_PARAM))
+        except InvalidCursor as error:
+            raise Http404(str(error))
+        now = time.time()
+        return serialize_page(page, [
+            serialize_post(post) for post in page
+        ]), max((post_time(post, now) for post in page), default=None)
+
+
+class CategoryFeedApiView(FeedApiView):
+    """Публикации опубликованной категории"""
+
+    paginate_by = PAGINATOR_CATEGORY
+
+    def get_queryset(self):
+        category = get_object_or_404(
+            Category, slug=self.kwargs['category_slug'], is_published=True
+        )
+        return get_posts_with_comments(category.posts.all())
+
+
+class ProfileFeedApiView(FeedApiView):
+    """Публикации пользователя; владелец видит и скрытые"""
+
+    paginate_by = PAGINATOR_PROFILE
+
+    def is_owner(self):
+        return self.request.user.get_username() == self.kwargs['username']
+
+    def get_viewer(self):
+        return f'user:{self.request.user.pk}' if self.is_owner() else 'public'
+
+    def get_queryset(self):
+        profile = get_object_or_404(User, username=self.kwargs['username'])
+        return get_posts_with_comments(
+            profile.posts.all(), filter_published=not self.is_owner()
+        )
+
+
+class PostApiView(ConditionalJsonMixin, View):
+    """Публикация и первая страница её комментариев"""
+
+    def get_viewer(self):
+        # Автор видит свою неопубликованную публикацию
+        user = self.request.user
+        return f'user:{user.pk}' if user.is_authenticated else 'public'
+
+    def get(self, request, *args, **kwargs):
+        return self.json_response(self.post_payload)
+
+    def post_payload(self):
+        post = get_visible_post(self.request, self.kwargs['post_id'])
+        comments = get_comments_page(post)
+        return {
+            'post': serialize_post(post),
+            'comments': serialize_page(
+                comments, [serialize_comment(item) for item in comments]
+            ),
+        }, max([
+            post_time(post, time.time()),
+            *(item.created_at.timestamp() for item in comments)
+        ])
+
+
+class PostCommentsApiView(PostApiView):
+    """Страница комментариев публикации после курсора"""
+
+    def get(self, request, *args, **kwargs):
+        return self.json_response(self.comments_payload)
+
+    def comments_payload(self):
+        post = get_visible_post(self.request, self.kwargs['post_id'])
+        comments = get_comments_page(
+            post, self.request.GET.get(CURSOR_PARAM)
+        )
+        return serialize_page(
+            comments, [serialize_comment(item) for item in comments]
+        ), max(
+            (item.created_at.timestamp() for item in comments), default=None
+        )
@@ -5,3 +5,14 @@ class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from blogicum.sqlite import apply_pragmas
+
+        from . import signals  # noqa: F401
+
+        connection_created.connect(
+            apply_pragmas, dispatch_uid='blogicum.sqlite.apply_pragmas'
+        )
@@ -0,0 +1,278 @@
+# Быстрая загрузка фикстур в формате dumpdata (db.json) и NDJSON
+# Файл читается по частям инкрементальным разбором JSON, записи
+# группируются по моделям и вставляются bulk_create пачками в порядке
+# зависимостей. Как и loaddata, загрузка идёт в одной транзакции
+# с отложенной проверкой внешних ключей, существующие строки с тем же pk
+# перезаписываются, а последовательности pk сбрасываются в конце
+# Заполненная пачка модели вставляется после накопленных строк моделей,
+# стоящих раньше неё в LOAD_ORDER. Строки, родители которых идут в файле
+# позже, вставляются раньше родителей: их проверяет отложенная проверка
+# внешних ключей, как и при loaddata
+
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.core.serializers import base
+from django.core.serializers.python import Deserializer
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+BATCH_SIZE = 1000
+READ_SIZE = 64 * 1024
+
+# Порядок вставки моделей блога; остальные модели идут после них
+# в порядке появления в файле
+LOAD_ORDER = (
+    'auth.user', 'blog.category', 'blog.location', 'blog.post',
+    'blog.comment',
+)
+
+
+@dataclass
+class LoadReport:
+    counts: dict = field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    @property
+    def rows_per_second(self):
+        return self.total / self.seconds if self.seconds else 0.0
+
+
+def load_rank(model):
+    """Место модели в порядке вставки"""
+    try:
+        return LOAD_ORDER.index(model._meta.label_lower)
+    except ValueError:
+        return len(LOAD_ORDER)
+
+
+def _skip_separators(buffer, position, separators):
+    while position < len(buffer) and (
+        buffer[position].isspace() or buffer[position] in separators
+    ):
+        position += 1
+    return position
+
+
+def _read_more(stream, buffer, position, read_size):
+    """Отбрасывает разобранную часть буфера и дочитывает файл"""
+    chunk = stream.read(read_size)
+    return buffer[position:] + chunk, 0, not chunk
+
+
+def iter_records(stream, read_size=READ_SIZE):
+    """
+    Записи фикстуры по одной: JSON-массив dumpdata или объекты,
+    разделённые пробелами и переводами строк (NDJSON)
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = '', 0, False
+    # None до первого значимого символа, ',' внутри массива, '' для NDJSON
+    separators = None
+
+    while True:
+        position = _skip_separators(buffer, position, separators or '')
+        if position == len(buffer):
+            if eof:
+                return
+            buffer, position, eof = _read_more(
+                stream, buffer, position, read_size
+            )
+            continue
+        if separators is None:
+            separators = ',' if buffer[position] == '[' else ''
+            position += len(separators)
+            continue
+        if separators and buffer[position] == ']':
+            return
+        try:
+            record, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as error:
+            if eof:
+                raise base.DeserializationError(
+                    f'Неверный JSON: {error}'
+                ) from error
+            buffer, position, eof = _read_more(
+                stream, buffer, position, read_size
+            )
+            continue
+        yield record
+
+
+@contextmanager
+def auto_now_disabled(model):
+    """Сохраняет даты из фикстуры вместо текущего времени"""
+    changed = []
+    for model_field in model._meta.concrete_fields:
+        flags = {
+            name: getattr(model_field, name)
+            for name in ('auto_now', 'auto_now_add')
+            if getattr(model_field, name, False)
+        }
+        if flags:
+            changed.append((model_field, flags))
+            for name in flags:
+                setattr(model_field, name, False)
+    try:
+        yield
+    finally:
+        for model_field, flags in changed:
+            for name, value in flags.items():
+                setattr(model_field, name, value)
+
+
+class BulkLoader:
+    """Накапливает объекты по моделям и вставляет их пачками"""
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, batch_size=BATCH_SIZE):
+        self.using = using
+        self.batch_size = batch_size
+        self.connection = connections[using]
+        self.pending = {}
+        self.deferred = []
+        self.report = LoadReport()
+        # Публикации, для которых загружены строки или комментарии
+        self.counted_posts = set()
+
+    def add(self, record):
+        for deserialized in Deserializer(
+            [record], using=self.using, handle_forward_references=True
+        ):
+            model = type(deserialized.object)
+            batch = self.pending.setdefault(model, [])
+            batch.append(deserialized)
+            if len(batch) >= self.batch_size:
+                self.flush_through(model)
+
+    def flush_through(self, model):
+        """Вставляет строки моделей до model в LOAD_ORDER, затем её пачку"""
+        rank = load_rank(model)
+        for earlier in sorted(self.pending, key=load_rank):
+            if load_rank(earlier) < rank:
+                self.flush(earlier)
+        self.flush(model)
+
+    def flush(self, model):
+        batch = self.pending.pop(model, [])
+        if not batch:
+            return
+        if model._meta.parents or any(
+            item.object.pk is None for item in batch
+        ):
+            # Наследованные модели и объекты без pk (natural keys)
+            # сохраняются по одному, как в loaddata
+            for item in batch:
+                item.save(using=self.using)
+        else:
+            self._bulk_insert(model, [item.object for item in batch])
+            self._set_m2m(model, batch)
+        self.deferred.extend(item for item in batch if item.deferred_fields)
+        label = model._meta.label_lower
+        if label == 'blog.post':
+            self.counted_posts.update(item.object.pk for item in batch)
+        elif label == 'blog.comment':
+            self.counted_posts.update(item.object.post_id for item in batch)
+        self.report.counts[label] = (
+            self.report.counts.get(label, 0) + len(batch)
+        )
+
+    def _bulk_insert(self, model, objects):
+        meta = model._meta
+        options = {}
+        update_fields = [
+            model_field.name for model_field in meta.local_concrete_fields
+            if not model_field.primary_key
+        ]
+        if self.connection.features.supports_update_conflicts_with_target:
+            if update_fields:
+                options = dict(
+                    update_conflicts=True, unique_fields=[meta.pk.name],
+                    update_fields=update_fields,
+                )
+            else:
+                options = dict(ignore_conflicts=True)
+        with auto_now_disabled(model):
+            model._base_manager.using(self.using).bulk_create(
+                objects, batch_size=self.batch_size, **options
+            )
+
+    def _set_m2m(self, model, batch):
+        """Связи многие-ко-многим заменяются, как при loaddata"""
+        for m2m_field in model._meta.many_to_many:
+            through = m2m_field.remote_field.through
+            if not through._meta.auto_created:
+                continue
+            source = f'{m2m_field.m2m_field_name()}_id'
+            target = f'{m2m_field.m2m_reverse_field_name()}_id'
+            rows = [
+                through(**{source: item.object.pk, target: related})
+                for item in batch
+                for related in item.m2m_data.get(m2m_field.name, ())
+            ]
+            through._base_manager.using(self.using).filter(**{
+                f'{source}__in': [item.object.pk for item in batch]
+            }).delete()
+            through._base_manager.using(self.using).bulk_create(
+                rows, batch_size=self.batch_size
+            )
+
+    def finish(self):
+        """Дозаписывает остатки в порядке зависимостей"""
+        for model in sorted(self.pending, key=load_rank):
+            self.flush(model)
+        for item in self.deferred:
+            item.save_deferred_fields(using=self.using)
+
+
+def load_fixture(stream, using=DEFAULT_DB_ALIAS, batch_size=BATCH_SIZE):
+    """Загружает фикстуру из потока; возвращает LoadReport"""
+    from .counts import actual_comment_count
+    from .models import Post
+    from .search import rebuild_index
+    from .visibility import (
+        invalidate_feeds, remember_next_publication, sync_visibility
+    )
+
+    connection = connections[using]
+    loader = BulkLoader(using, batch_size)
+    started = time.perf_counter()
+    with transaction.atomic(using=using):
+        with connection.constraint_checks_disabled():
+            # Внешние ключи проверяются один раз после вставки всех строк
+            for record in iter_records(stream):
+                loader.add(record)
+            loader.finish()
+        models = [
+            apps.get_model(label) for label in loader.report.counts
+        ]
+        connection.check_constraints(
+            table_names=[model._meta.db_table for model in models]
+        )
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), models)
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+        # bulk_create не вызывает Post.save и сигналы: флаг видимости,
+        # счётчики комментариев и поисковый индекс строятся здесь.
+        # Счётчик в файле мог устареть (выгрузка до миграции 0018,
+        # export_ndjson --since с новыми комментариями старых публикаций)
+        sync_visibility(Post.objects.using(using))
+        posts = sorted(loader.counted_posts)
+        for start in range(0, len(posts), batch_size):
+            Post.objects.using(using).filter(
+                pk__in=posts[start:start + batch_size]
+            ).update(comment_count=actual_comment_count())
+        if {'blog.post', 'blog.comment'} & set(loader.report.counts):
+            rebuild_index(using)
+    loader.report.seconds = time.perf_counter() - started
+    invalidate_feeds()
+    remember_next_publication()
+    return loader.report
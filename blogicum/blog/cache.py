@@ -0,0 +1,184 @@
+# Кэш страниц блога для анонимных читателей
+# Ключ страницы содержит «поколение» кэша: изменение публикаций,
+# комментариев, категорий или местоположений увеличивает его, и старые
+# записи перестают находиться. Поэтому инвалидация не требует удаления
+# по шаблону и одинаково работает с locmem, файловым кэшем и Redis
+# Карточки публикаций кэшируются по отдельности: ключ — хэш всех
+# отображаемых полей публикации, её категории и местоположения, поэтому
+# правка публикации меняет ключ только её карточки
+# Число публикаций в лентах для пагинатора кэшируется с коротким сроком
+# и своим поколением: комментарии его не сбрасывают, а создание,
+# удаление и смена статуса публикаций и категорий сбрасывают
+# Время последнего сброса кэша страниц служит нижней оценкой
+# Last-Modified ответов JSON API (blog/api.py): в схеме нет времени
+# изменения строк, а правка любых отображаемых данных сбрасывает кэш
+# Реплика может отставать от записи, сбросившей кэш: данные, прочитанные
+# с реплики в течение DATABASE_REPLICA_STICKY_SECONDS после сброса,
+# отдаются, но не сохраняются, иначе устаревшая страница закрепилась бы
+# под новым поколением
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone, translation
+
+from blogicum.routers import replica_reads_active
+
+GENERATION_KEY = 'blog:page-cache:generation'
+COUNT_GENERATION_KEY = 'blog:count-cache:generation'
+CHANGED_AT_KEY = 'blog:page-cache:changed-at'
+
+# Параметры запроса, от которых зависит содержимое страницы
+PAGE_CACHE_PARAMS = ('page', 'cursor')
+
+# Увеличивается при изменении шаблона includes/post_card.html
+CARD_TEMPLATE_VERSION = 1
+
+
+def get_page_cache():
+    """Бэкенд кэша, заданный BLOG_PAGE_CACHE_ALIAS"""
+    return caches[getattr(settings, 'BLOG_PAGE_CACHE_ALIAS', 'default')]
+
+
+def get_generation(cache, key=GENERATION_KEY):
+    """
+    Текущее поколение кэша; после вытеснения ключа начинается с отметки
+    времени, чтобы не совпасть с поколением старых записей
+    """
+    generation = cache.get(key)
+    if generation is None:
+        generation = time.time_ns()
+        if not cache.add(key, generation, None):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def next_generation(key):
+    """Увеличивает поколение key"""
+    cache = get_page_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def invalidate_page_cache():
+    """Делает недоступными все закэшированные страницы"""
+    next_generation(GENERATION_KEY)
+    get_page_cache().set(CHANGED_AT_KEY, time.time(), None)
+
+
+def last_change_time():
+    """Время (timestamp) последнего сброса кэша страниц или None"""
+    return get_page_cache().get(CHANGED_AT_KEY)
+
+
+def replica_may_lag():
+    """
+    Чтение идёт с реплики, а кэш сбрасывался не раньше чем
+    DATABASE_REPLICA_STICKY_SECONDS назад: реплика могла ещё не получить
+    запись. Числа публикаций сбрасываются вместе с кэшем страниц
+    """
+    if not replica_reads_active():
+        return False
+    changed = last_change_time()
+    return changed is not None and time.time() - changed < getattr(
+        settings, 'DATABASE_REPLICA_STICKY_SECONDS', 10
+    )
+
+
+def invalidate_feed_counts():
+    """Делает недоступными все закэшированные числа публикаций"""
+    next_generation(COUNT_GENERATION_KEY)
+
+
+def get_feed_count(name, queryset):
+    """
+    Число публикаций ленты name из кэша; при промахе выполняет
+    queryset.count(). None, если кэш отключён BLOG_FEED_COUNT_TIMEOUT = 0
+    """
+    timeout = getattr(settings, 'BLOG_FEED_COUNT_TIMEOUT', 0)
+    if not timeout:
+        return None
+    cache = get_page_cache()
+    generation = get_generation(cache, COUNT_GENERATION_KEY)
+    key = f'blog:count:{generation}:{name}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        if not replica_may_lag():
+            cache.set(key, count, timeout)
+    return count
+
+
+def page_cache_key(request, generation, kind='page'):
+    """Ключ страницы: путь и параметры пагинации; kind — вид ответа"""
+    params = '&'.join(
+        f'{name}={request.GET.get(name)}'
+        for name in PAGE_CACHE_PARAMS if name in request.GET
+    )
+    digest = hashlib.md5(
+        f'{request.path}?{params}'.encode(), usedforsecurity=False
+    ).hexdigest()
+    return f'blog:{kind}:{generation}:{digest}'
+
+
+def post_card_key(post):
+    """
+    Ключ карточки: поля публикации, автора, категории и местоположения,
+    которые выводит шаблон, а также язык и часовой пояс для дат
+    """
+    category, location = post.category, post.location
+    state = (
+        CARD_TEMPLATE_VERSION,
+        post.pk, post.title, post.text, post.pub_date.isoformat(),
+        post.is_published, post.image.name, sorted(
+            post.image_variants.items()
+        ) if post.image_variants else None,
+        post.comment_count, post.author.get_username(),
+        (category.slug, category.title, category.is_published)
+        if category else None,
+        (location.name, location.is_published) if location else None,
+        translation.get_language(), timezone.get_current_timezone_name(),
+    )
+    digest = hashlib.md5(
+        repr(state).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f'blog:card:{post.pk}:{digest}'
+
+
+class AnonymousPageCacheMixin:
+    """
+    Отдаёт анонимным GET-запросам готовую страницу из кэша
+    Страницы с CSRF-токеном и cookie и страницы, прочитанные с реплики
+    сразу после изменения данных, не кэшируются
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+                or not getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', 0)):
+            return super().dispatch(request, *args, **kwargs)
+
+        cache = get_page_cache()
+        key = page_cache_key(request, get_generation(cache))
+        response = cache.get(key)
+        if response is not None:
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if request.method == 'GET' and response.status_code == 200:
+            def store(rendered):
+                if (rendered.cookies
+                        or request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+                        or replica_may_lag()):
+                    return
+                cache.set(key, rendered, settings.BLOG_PAGE_CACHE_TIMEOUT)
+
+            if getattr(response, 'is_rendered', True):
+                store(response)
+            else:
+                response.add_post_render_callback(store)
+        return response
@@ -0,0 +1,18 @@
+# Фактическое число комментариев публикаций для денормализованного
+# счётчика Post.comment_count: его пересчитывают сигналы при loaddata,
+# загрузка фикстур (blog/bulk_load.py) и команда recount_comments
+
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment
+
+
+def actual_comment_count():
+    """Подзапрос с фактическим числом комментариев публикации"""
+    counts = (
+        Comment.objects.filter(post=OuterRef('pk'))
+        .order_by().values('post').annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), 0)
@@ -0,0 +1,76 @@
+# Потоковая выгрузка данных блога в NDJSON
+# Каждая строка — объект в формате dumpdata ({"model", "pk", "fields"}),
+# поэтому выгрузку можно загрузить обратно через loaddata (*.jsonl).
+# Строки читаются через .iterator(chunk_size=...) и сериализуются по одной,
+# расход памяти не зависит от размера таблиц
+
+from datetime import datetime, time
+
+from django.core import serializers
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Category, Comment, Location, Post
+
+CHUNK_SIZE = 2000
+
+# Порядок выгрузки учитывает внешние ключи: справочники раньше публикаций,
+# публикации раньше комментариев
+EXPORT_MODELS = {
+    'category': Category,
+    'location': Location,
+    'post': Post,
+    'comment': Comment,
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def parse_since(value):
+    """Дата или дата со временем в ISO 8601; наивное время — текущий пояс"""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ExportError(f'Неверная дата: {value}')
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def parse_models(value):
+    """Список моделей через запятую; пустое значение — все модели"""
+    if not value:
+        return list(EXPORT_MODELS)
+    names = [name.strip().lower() for name in value.split(',')]
+    unknown = [name for name in names if name not in EXPORT_MODELS]
+    if unknown:
+        raise ExportError(f'Неизвестные модели: {", ".join(unknown)}')
+    return [name for name in EXPORT_MODELS if name in names]
+
+
+def export_queryset(model, since=None):
+    """
+    Строки модели по возрастанию pk; с since — созданные после него,
+    а для публикаций ещё и опубликованные после него
+    """
+    queryset = model._default_manager.order_by('pk')
+    if since is not None:
+        changed = Q(created_at__gte=since)
+        if model is Post:
+            changed |= Q(pub_date__gte=since)
+        queryset = queryset.filter(changed)
+    return queryset
+
+
+def iter_ndjson(models=None, since=None, chunk_size=CHUNK_SIZE):
+    """Генератор строк NDJSON, каждая заканчивается переводом строки"""
+    serializer = serializers.get_serializer('jsonl')()
+    for name in models or EXPORT_MODELS:
+        queryset = export_queryset(EXPORT_MODELS[name], since)
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            yield serializer.serialize([obj])
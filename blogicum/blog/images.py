@@ -0,0 +1,202 @@
+# Уменьшенные копии изображений публикаций
+# Для каждого загруженного изображения создаются копии фиксированной ширины
+# в исходном формате (JPEG или PNG) и в WebP. Копии строятся после
+# фиксации транзакции в фоновом потоке, чтобы не задерживать ответ на
+# сохранение публикации; готовность отмечается полем Post.image_variants
+# Имя копии содержит хэш полного имени оригинала, поэтому a.jpg и a.png
+# не делят копии. Копии удаляются после замены изображения и удаления
+# публикации
+
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_WIDTHS = (320, 640, 960)
+VARIANTS_DIR = 'variants'
+# Версия схемы имён копий в Post.image_variants; копии прежней схемы
+# перестраивает backfill_post_images
+VARIANTS_LAYOUT = 2
+WEBP = ('webp', 'WEBP')
+# Оригиналы этих форматов могут быть прозрачными, их копии сохраняются в PNG
+ALPHA_EXTENSIONS = ('.png', '.gif', '.webp')
+
+_executor = None
+
+
+def fallback_format(name):
+    """Формат копии для браузеров без WebP"""
+    if name.lower().endswith(ALPHA_EXTENSIONS):
+        return ('png', 'PNG')
+    return ('jpg', 'JPEG')
+
+
+def variant_widths(width):
+    """Ширины копий, меньшие ширины оригинала"""
+    return [size for size in THUMBNAIL_WIDTHS if size < width]
+
+
+def variant_height(width, height, variant_width):
+    return max(1, round(height * variant_width / width))
+
+
+def variants_ready(variants, name):
+    """Копии из image_variants построены для изображения name"""
+    return (variants.get('name') == name
+            and variants.get('layout') == VARIANTS_LAYOUT)
+
+
+def variant_name(name, width, extension):
+    """
+    Путь копии: post_images/variants/<имя>_<хэш>_<ширина>.<расширение>;
+    хэш полного имени различает оригиналы с одним именем и разными
+    расширениями
+    """
+    path = PurePosixPath(name)
+    digest = hashlib.md5(name.encode(), usedforsecurity=False).hexdigest()
+    return str(
+        path.parent / VARIANTS_DIR
+        / f'{path.stem}_{digest[:8]}_{width}.{extension}'
+    )
+
+
+def variant_names(name):
+    """Пути всех возможных копий изображения name"""
+    extensions = (WEBP[0], fallback_format(name)[0])
+    return [
+        variant_name(name, width, extension)
+        for width in THUMBNAIL_WIDTHS for extension in extensions
+    ]
+
+
+def delete_variants(name):
+    for variant in variant_names(name):
+        default_storage.delete(variant)
+
+
+def remove_variants(*names):
+    """Удаляет копии изображений names после фиксации транзакции"""
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(
+            lambda: [delete_variants(name) for name in names]
+        )
+
+
+def variant_srcsets(name, width):
+    """
+    Возвращает пары (тип, srcset) для WebP и запасного формата;
+    оригинал входит в запасной srcset со своей шириной
+    """
+    widths = variant_widths(width)
+    fallback_extension, _ = fallback_format(name)
+    webp = [
+        (default_storage.url(variant_name(name, size, WEBP[0])), size)
+        for size in widths
+    ]
+    fallback = [
+        (default_storage.url(variant_name(name, size, fallback_extension)),
+         size)
+        for size in widths
+    ]
+    fallback.append((default_storage.url(name), width))
+    return [
+        (mime, ', '.join(f'{url} {size}w' for url, size in candidates))
+        for mime, candidates in (('image/webp', webp), (None, fallback))
+        if candidates
+    ]
+
+
+def _save(image, name, image_format):
+    buffer = BytesIO()
+    options = {'quality': 82} if image_format in ('JPEG', 'WEBP') else {}
+    image.save(buffer, image_format, optimize=True, **options)
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def generate_variants(name):
+    """Создаёт копии изображения name; возвращает размеры оригинала"""
+    with default_storage.open(name) as file, Image.open(file) as original:
+        image = ImageOps.exif_transpose(original)
+        fallback = fallback_format(name)
+        image = image.convert('RGBA' if fallback[1] == 'PNG' else 'RGB')
+        width, height = image.size
+        for size in variant_widths(width):
+            resized = image.resize(
+                (size, variant_height(width, height, size)),
+                Image.Resampling.LANCZOS
+            )
+            for extension, image_format in (WEBP, fallback):
+                _save(
+                    resized, variant_name(name, size, extension), image_format
+                )
+    return width, height
+
+
+def process_post_image(post_id, name):
+    """Строит копии и отмечает публикацию, если изображение не сменилось"""
+    from .cache import invalidate_page_cache
+    from .models import Post
+
+    try:
+        width, height = generate_variants(name)
+    except (OSError, ValueError):
+        logger.exception('Не удалось создать копии изображения %s', name)
+        return False
+    updated = Post.objects.filter(pk=post_id, image=name).update(
+        image_variants={
+            'name': name, 'width': width, 'height': height,
+            'layout': VARIANTS_LAYOUT,
+        }
+    )
+    if updated:
+        invalidate_page_cache()
+    else:
+        # Изображение заменили или публикацию удалили во время обработки
+        delete_variants(name)
+    return bool(updated)
+
+
+def _process_in_thread(post_id, name):
+    """Фоновый поток открывает и закрывает собственное соединение с БД"""
+    close_old_connections()
+    try:
+        process_post_image(post_id, name)
+    except Exception:
+        logger.exception('Ошибка обработки изображения %s', name)
+    finally:
+        close_old_connections()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'BLOG_IMAGE_WORKERS', 2),
+            thread_name_prefix='post-images'
+        )
+    return _executor
+
+
+def schedule_post_image(post):
+    """Ставит построение копий в очередь после фиксации транзакции"""
+    post_id, name = post.pk, post.image.name
+
+    def run():
+        if getattr(settings, 'BLOG_IMAGE_VARIANTS_ASYNC', True):
+            get_executor().submit(_process_in_thread, post_id, name)
+        else:
+            process_post_image(post_id, name)
+
+    transaction.on_commit(run)
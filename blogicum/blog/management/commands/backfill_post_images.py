@@ -0,0 +1,38 @@
+# Построение уменьшенных копий для уже загруженных изображений
+# Обрабатывает публикации, для текущего изображения которых копий ещё нет
+# или они построены по прежней схеме имён, и заполняет размеры
+# изображения
+
+from django.core.management.base import BaseCommand
+
+from blog.images import process_post_image, variants_ready
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит уменьшенные копии изображений публикаций'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Перестроить копии и для уже обработанных изображений'
+        )
+
+    def handle(self, *args, force=False, **options):
+        posts = Post.objects.exclude(image='').values_list(
+            'pk', 'image', 'image_variants'
+        )
+        processed = failed = 0
+        for pk, name, variants in posts.iterator():
+            if not force and variants_ready(variants, name):
+                continue
+            if process_post_image(pk, name):
+                processed += 1
+            else:
+                failed += 1
+                self.stderr.write(
+                    f'Публикация {pk}: не удалось обработать {name}'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {processed}, с ошибками: {failed}'
+        ))
@@ -0,0 +1,79 @@
+# Замер страниц списков админки на наборах данных растущего размера
+# Время ответа, число SQL-запросов и размер HTML должны оставаться
+# примерно постоянными: строки списка ограничены list_per_page, а
+# внешние ключи выводятся без <select> всех строк связанной таблицы
+
+import json
+import logging
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.test.utils import setup_databases, teardown_databases
+
+from benchmarks.harness import (
+    Dataset, make_admin, measure_changelist, seed_dataset
+)
+
+CHANGELISTS = ('/admin/blog/post/', '/admin/blog/comment/')
+
+
+def dataset_for(posts):
+    """Набор данных, в котором все таблицы растут вместе с публикациями"""
+    return Dataset(
+        users=max(10, posts // 10), categories=max(3, posts // 100),
+        locations=max(5, posts // 20), posts=posts, comments=posts * 2
+    )
+
+
+class Command(BaseCommand):
+    help = 'Время и размер страниц списков админки при росте таблиц'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000',
+                            help='Число публикаций в наборах через запятую')
+        parser.add_argument('--requests', type=int, default=10,
+                            help='Запросов на каждую страницу')
+        parser.add_argument('--output',
+                            help='Файл для результатов в JSON')
+
+    def handle(self, *args, sizes='', requests=10, output=None, **options):
+        try:
+            sizes = [int(size) for size in sizes.split(',')]
+        except ValueError:
+            raise CommandError('--sizes: ожидаются числа через запятую')
+        timing_logger = logging.getLogger('blogicum.timing')
+        timing_level = timing_logger.level
+        timing_logger.setLevel(logging.ERROR)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(DEBUG=False):
+                results = self.run(sizes, requests)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            timing_logger.setLevel(timing_level)
+
+        self.stdout.write(
+            f'{"публикаций":>10} {"страница":<24} {"мс":>9}'
+            f' {"запросов":>9} {"КБ":>8}'
+        )
+        for size, pages in results.items():
+            for url, row in pages.items():
+                self.stdout.write(
+                    f'{size:>10} {url:<24} {row["mean_ms"]:>9.2f}'
+                    f' {row["queries"]:>9.1f} {row["kb"]:>8.1f}'
+                )
+        if output:
+            with open(output, 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+
+    def run(self, sizes, requests):
+        results = {}
+        for size in sizes:
+            call_command('flush', interactive=False, verbosity=0)
+            admin = make_admin(seed_dataset(dataset_for(size)))
+            results[size] = {
+                url: measure_changelist(url, admin, requests)
+                for url in CHANGELISTS
+            }
+        return results
@@ -0,0 +1,78 @@
+# Замер времени рендеринга шаблонов по страницам
+# Сравнивает загрузку шаблонов без кэша, кэширующий загрузчик без прогрева
+# (первый запрос разбирает шаблоны) и кэширующий загрузчик после
+# warm_templates, как в settings_production
+
+import json
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.test.utils import setup_databases, teardown_databases
+
+from benchmarks.harness import (
+    Dataset, collect_targets, measure_render, seed_dataset, template_settings
+)
+from blogicum.warmup import warm_templates
+
+PROFILES = ('uncached', 'cached', 'warmed')
+
+
+class Command(BaseCommand):
+    help = 'Время рендеринга шаблонов страниц с кэшем загрузчика и без него'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20,
+                            help='Запросов на каждую страницу')
+        parser.add_argument('--output',
+                            help='Файл для результатов в JSON')
+
+    def handle(self, *args, requests=20, output=None, **options):
+        timing_logger = logging.getLogger('blogicum.timing')
+        timing_level = timing_logger.level
+        timing_logger.setLevel(logging.ERROR)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(DEBUG=False, BLOG_PAGE_CACHE_TIMEOUT=0,
+                                   REQUEST_TIMING_HEADER=True):
+                results = self.run(requests)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            timing_logger.setLevel(timing_level)
+
+        header = f'{"страница":<40}' + ''.join(
+            f' {profile + " 1-й":>14} {"среднее":>8}' for profile in PROFILES
+        )
+        self.stdout.write(header)
+        for name, row in results.items():
+            self.stdout.write(f'{name:<40}' + ''.join(
+                f' {row[profile]["first_ms"]:>14.2f}'
+                f' {row[profile]["mean_ms"]:>8.2f}'
+                for profile in PROFILES
+            ))
+        if output:
+            with open(output, 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+
+    def run(self, requests):
+        author = seed_dataset(Dataset(
+            users=10, categories=3, locations=5, posts=200, comments=1000
+        ))
+        targets = collect_targets(author)
+        results = {}
+        for profile in PROFILES:
+            templates = template_settings(
+                settings.TEMPLATES, cached=profile != 'uncached'
+            )
+            # Смена TEMPLATES пересоздаёт движки вместе с кэшем загрузчика
+            with override_settings(TEMPLATES=templates):
+                if profile == 'warmed':
+                    warm_templates()
+                for target in targets:
+                    measured = measure_render(target, author, requests)
+                    if measured is not None:
+                        results.setdefault(target.name, {})[profile] = (
+                            measured
+                        )
+        return results
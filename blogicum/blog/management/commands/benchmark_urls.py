@@ -0,0 +1,108 @@
+# Замер задержки и пропускной способности всех страниц blog и pages
+# Создаёт отдельную тестовую базу, заполняет её синтетическими данными,
+# прогоняет каждый адрес через WSGI-приложение в нескольких потоках и
+# сохраняет результат в JSON; --compare сравнивает с сохранённым прогоном
+
+import json
+import logging
+from dataclasses import asdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.test.utils import setup_databases, teardown_databases
+
+from benchmarks.harness import (
+    Dataset, collect_targets, compare, run_target, seed_dataset
+)
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный замер страниц блога на синтетических данных'
+
+    def add_arguments(self, parser):
+        defaults = Dataset()
+        for name in ('users', 'categories', 'locations', 'posts',
+                     'comments', 'seed'):
+            parser.add_argument(
+                f'--{name}', type=int, default=getattr(defaults, name)
+            )
+        parser.add_argument('--requests', type=int, default=100,
+                            help='Запросов на каждый адрес')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Число одновременных клиентов')
+        parser.add_argument('--filter', default='',
+                            help='Замерять только адреса с этой подстрокой')
+        parser.add_argument('--page-cache', action='store_true',
+                            help='Не отключать кэш страниц для анонимов')
+        parser.add_argument('--output', default='benchmark.json',
+                            help='Файл для результатов')
+        parser.add_argument('--compare', metavar='BASELINE',
+                            help='Сравнить с сохранённым прогоном')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Допустимое ухудшение, доля (0.2 = 20%%)')
+
+    def handle(self, *args, **options):
+        dataset = Dataset(**{
+            name: options[name] for name in (
+                'users', 'categories', 'locations', 'posts', 'comments',
+                'seed'
+            )
+        })
+        overrides = {'DEBUG': False}
+        if not options['page_cache']:
+            overrides['BLOG_PAGE_CACHE_TIMEOUT'] = 0
+        timing_logger = logging.getLogger('blogicum.timing')
+        timing_level = timing_logger.level
+        timing_logger.setLevel(logging.ERROR)
+
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(**overrides):
+                results = self.run(dataset, options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            timing_logger.setLevel(timing_level)
+
+        report = {
+            'dataset': asdict(dataset),
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'page_cache': options['page_cache'],
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(f'Результаты сохранены в {options["output"]}')
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                baseline = json.load(file)['results']
+            regressions = compare(results, baseline, options['threshold'])
+            if regressions:
+                for line in regressions:
+                    self.stdout.write(self.style.ERROR(line))
+                raise CommandError(f'Регрессий: {len(regressions)}')
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def run(self, dataset, options):
+        self.stdout.write('Заполнение базы...')
+        author = seed_dataset(dataset)
+        results = {}
+        header = (f'{"страница":<40} {"p50":>8} {"p95":>8} {"p99":>8} '
+                  f'{"RPS":>8} {"SQL":>6}')
+        self.stdout.write(header)
+        for target in collect_targets(author):
+            if options['filter'] not in target.name:
+                continue
+            result = run_target(
+                target, author, requests=options['requests'],
+                concurrency=options['concurrency']
+            )
+            results[target.name] = asdict(result)
+            line = (f'{target.name:<40} {result.p50_ms:>8.2f} '
+                    f'{result.p95_ms:>8.2f} {result.p99_ms:>8.2f} '
+                    f'{result.rps:>8.1f} {result.queries:>6.1f}')
+            if result.errors:
+                line += f'  ошибок: {result.errors}'
+            self.stdout.write(line)
+        return results
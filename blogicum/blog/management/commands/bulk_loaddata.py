@@ -0,0 +1,42 @@
+# Загрузка фикстуры dumpdata (db.json) или NDJSON через bulk_create
+# Результат совпадает с loaddata, но объекты вставляются пачками,
+# без сигналов и без разбора всего файла в памяти
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.base import DeserializationError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, IntegrityError
+
+from blog.bulk_load import BATCH_SIZE, load_fixture
+
+
+class Command(BaseCommand):
+    help = 'Быстро загружает фикстуру в формате dumpdata пакетными INSERT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixture', help='Путь к файлу фикстуры')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Число объектов в одном INSERT'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='База данных для загрузки'
+        )
+
+    def handle(self, *args, fixture, batch_size=BATCH_SIZE,
+               database=DEFAULT_DB_ALIAS, verbosity=1, **options):
+        try:
+            with open(fixture, encoding='utf-8') as stream:
+                report = load_fixture(stream, database, batch_size)
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть {fixture}: {error}')
+        except (DeserializationError, DatabaseError, IntegrityError) as error:
+            raise CommandError(f'Фикстура {fixture} не загружена: {error}')
+
+        if verbosity > 1:
+            for label, count in report.counts.items():
+                self.stdout.write(f'{label}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено объектов: {report.total} за {report.seconds:.2f} с'
+            f' ({report.rows_per_second:.0f} строк/с)'
+        ))
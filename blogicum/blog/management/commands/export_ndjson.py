@@ -0,0 +1,47 @@
+# Потоковая выгрузка публикаций, комментариев, категорий и местоположений
+# в NDJSON; с --since выгружаются только строки, созданные (или
+# опубликованные) после указанной даты
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.export import (
+    CHUNK_SIZE, ExportError, iter_ndjson, parse_models, parse_since
+)
+
+
+class Command(BaseCommand):
+    help = 'Выгружает данные блога в NDJSON без загрузки таблиц в память'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Только строки, созданные или опубликованные после даты'
+                 ' (ISO 8601)'
+        )
+        parser.add_argument(
+            '--models',
+            help='Модели через запятую: category, location, post, comment'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Число строк, читаемых из базы за один раз'
+        )
+        parser.add_argument(
+            '-o', '--output', help='Файл для выгрузки; по умолчанию stdout'
+        )
+
+    def handle(self, *args, since=None, models=None, chunk_size=CHUNK_SIZE,
+               output=None, **options):
+        try:
+            models = parse_models(models)
+            since = parse_since(since) if since else None
+        except ExportError as error:
+            raise CommandError(error)
+
+        lines = iter_ndjson(models, since, chunk_size)
+        if output is None:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(output, 'w', encoding='utf-8') as stream:
+            stream.writelines(lines)
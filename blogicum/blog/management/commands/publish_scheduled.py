@@ -0,0 +1,42 @@
+# Показ отложенных публикаций по расписанию (cron, systemd timer)
+# Включает Post.is_visible у публикаций, дата которых наступила, и
+# запоминает время следующей; --full заново сверяет флаг у всех
+# публикаций, например после loaddata или правок базы вручную
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.visibility import (
+    next_publication_time, publish_scheduled, remember_next_publication,
+    sync_visibility
+)
+
+
+class Command(BaseCommand):
+    help = 'Показывает в лентах отложенные публикации, дата которых наступила'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать видимость всех публикаций'
+        )
+
+    def handle(self, *args, full=False, **options):
+        if full:
+            changed = sync_visibility()
+            remember_next_publication()
+            self.stdout.write(f'Видимость изменена у публикаций: {changed}')
+        else:
+            published = publish_scheduled()
+            self.stdout.write(f'Показано публикаций: {published}')
+
+        next_time = next_publication_time()
+        if next_time:
+            moment = timezone.localtime(
+                datetime.fromtimestamp(next_time, dt_timezone.utc)
+            )
+            self.stdout.write(f'Следующая отложенная публикация: {moment}')
+        else:
+            self.stdout.write('Отложенных публикаций нет')
@@ -0,0 +1,31 @@
+# Построение поисковых индексов публикаций и комментариев заново
+# (blog/search.py)
+# Нужно после загрузки данных в обход Post.save: bulk_create, правки
+# базы вручную, восстановление из резервной копии
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from blog.search import has_fts, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Строит поисковые индексы публикаций и комментариев заново'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Псевдоним базы данных'
+        )
+
+    def handle(self, *args, database=DEFAULT_DB_ALIAS, **options):
+        started = time.perf_counter()
+        with transaction.atomic(using=database):
+            total = rebuild_index(database)
+        backend = 'FTS5' if has_fts(database) else 'PostSearchTerm'
+        self.stdout.write(
+            f'Проиндексировано публикаций: {total} ({backend}) за'
+            f' {time.perf_counter() - started:.2f} с'
+        )
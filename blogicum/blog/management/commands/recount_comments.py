@@ -0,0 +1,53 @@
+# Пересчёт денормализованного счётчика Post.comment_count
+# Сравнивает сохранённые значения с фактическим числом комментариев,
+# сообщает о расхождениях и исправляет их пакетными UPDATE
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from blog.counts import actual_comment_count
+from blog.models import Post
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает Post.comment_count и сообщает о расхождениях'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только сообщить о расхождениях, не исправляя их'
+        )
+
+    def handle(self, *args, dry_run=False, verbosity=1, **options):
+        drifted = (
+            Post.objects.annotate(actual=actual_comment_count())
+            .exclude(comment_count=F('actual'))
+            .order_by('pk')
+            .values_list('pk', 'comment_count', 'actual')
+        )
+        drifted_ids = []
+        for pk, stored, actual in drifted.iterator(chunk_size=BATCH_SIZE):
+            drifted_ids.append(pk)
+            if verbosity > 1:
+                self.stdout.write(
+                    f'Публикация {pk}: сохранено {stored}, фактически {actual}'
+                )
+
+        if not drifted_ids:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+            return
+        self.stdout.write(
+            self.style.WARNING(f'Расхождений: {len(drifted_ids)}')
+        )
+        if dry_run:
+            return
+
+        with transaction.atomic():
+            for start in range(0, len(drifted_ids), BATCH_SIZE):
+                Post.objects.filter(
+                    pk__in=drifted_ids[start:start + BATCH_SIZE]
+                ).update(comment_count=actual_comment_count())
+        self.stdout.write(self.style.SUCCESS('Счётчики исправлены'))
@@ -0,0 +1,103 @@
+# Нагрузочная проверка записи в SQLite
+# Для каждого профиля PRAGMA создаётся отдельная временная база-файл,
+# писатели одновременно создают публикации и комментарии, читатели
+# открывают ленту; сравниваются ошибки «database is locked» и RPS.
+# Клиенты работают в отдельных процессах, как воркеры WSGI-сервера
+
+import json
+import logging
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+
+from benchmarks.harness import Dataset, run_write_stress, seed_dataset
+from blog.models import Post
+from blogicum.sqlite import TUNED_PRAGMAS
+
+PROFILES = {
+    'default': {},
+    'tuned': TUNED_PRAGMAS,
+}
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает блокировки SQLite с настройками по умолчанию и с WAL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4,
+                            help='Число потоков, создающих записи')
+        parser.add_argument('--readers', type=int, default=4,
+                            help='Число потоков, читающих страницы')
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Запросов на каждый поток')
+        parser.add_argument('--threads', action='store_true',
+                            help='Потоки вместо процессов')
+        parser.add_argument('--output',
+                            help='Файл для результатов в JSON')
+
+    def handle(self, *args, writers=4, readers=4, requests=50, output=None,
+               threads=False, **options):
+        timing_logger = logging.getLogger('blogicum.timing')
+        timing_level = timing_logger.level
+        timing_logger.setLevel(logging.ERROR)
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        test_name = test_settings.get('NAME')
+        results = {}
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                for profile, pragmas in PROFILES.items():
+                    test_settings['NAME'] = str(
+                        Path(directory) / f'{profile}.sqlite3'
+                    )
+                    with override_settings(
+                        DEBUG=False, BLOG_PAGE_CACHE_TIMEOUT=0,
+                        SQLITE_PRAGMAS=pragmas
+                    ):
+                        results[profile] = self.run(
+                            writers, readers, requests, not threads
+                        )
+        finally:
+            test_settings['NAME'] = test_name
+            timing_logger.setLevel(timing_level)
+
+        for profile, result in results.items():
+            self.stdout.write(
+                f'{profile:<8} {result["journal_mode"]:<8}'
+                f' RPS {result["rps"]:>8.1f}'
+                f'  записей {result["writes"]:>5}'
+                f'  блокировок {result["lock_errors"]:>4}'
+                f'  прочих ошибок {result["errors"]:>4}'
+            )
+        if output:
+            with open(output, 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+
+    def run(self, writers, readers, requests, processes):
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            author = seed_dataset(Dataset(
+                users=5, categories=2, locations=2, posts=200, comments=500
+            ))
+            sample = author.posts.first()
+            post = Post.objects.create(
+                title='Публикация для комментариев', text='Текст',
+                pub_date=timezone.now(), author=author,
+                category=sample.category, location=sample.location,
+            )
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                journal_mode = cursor.fetchone()[0]
+            result = asdict(run_write_stress(
+                author, post, writers=writers, readers=readers,
+                requests=requests, processes=processes
+            ))
+            return dict(result, journal_mode=journal_mode)
+        finally:
+            connection.close()
+            teardown_databases(old_config, verbosity=0)
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:36
+
+from django.db import OperationalError, migrations, models
+
+
+def create_fts_table(apps, schema_editor):
+    # Без FTS5 текст комментариев ищется через icontains
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE blog_comment_fts USING fts5("
+            "text, tokenize='unicode61 remove_diacritics 2')"
+        )
+    except OperationalError:
+        return
+    schema_editor.execute(
+        'INSERT INTO blog_comment_fts(rowid, text) '
+        'SELECT id, text FROM blog_comment'
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS blog_comment_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0022_post_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created_at'], name='comment_created_idx'),
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -5,10 +5,18 @@
 # Location: хранение местоположения публикации
 # Post: публикация с возможностью добавления изображения,
 #                                                   категории и местоположения
+#       comment_count хранит число комментариев и меняется только
+#       атомарными UPDATE из blog/signals.py
+#       is_visible — проекция видимости для лент (blog/visibility.py)
 # Comment: комментарий для публикации
+# PostSearchTerm: инвертированный индекс поиска для баз без FTS5
+#                 (blog/search.py)
 
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
+
+from .images import variants_ready
 
 User = get_user_model()
 
@@ -92,8 +100,19 @@ class Post(PublishedCreated):
             location (связь с моделью Location)
             category (связь с моделью Category)
             image (поле для загрузки изображения)
+            image_variants (имя и размеры изображения, для которого
+                                            построены уменьшенные копии)
+            comment_count (число комментариев, поддерживается сигналами)
+            is_visible (публикация видна в лентах: опубликована, категория
+                                    опубликована и наступила pub_date)
     """
 
+    # Поля, которые обновляются отдельными запросами и не должны
+    # перезаписываться при сохранении формы или админки
+    DENORMALIZED_FIELDS = ('comment_count', 'image_variants')
+    # Поля, от которых зависит is_visible
+    VISIBILITY_FIELDS = ('is_published', 'pub_date', 'category', 'category_id')
+
     title = models.CharField(max_length=256, verbose_name='Название')
     text = models.TextField(verbose_name='Текст')
     pub_date = models.DateTimeField(
@@ -119,17 +138,104 @@ class Post(PublishedCreated):
     )
     image = models.ImageField('Изображение', upload_to='post_images',
                               blank=True)
+    image_variants = models.JSONField(
+        default=dict, blank=True, editable=False,
+        verbose_name='Уменьшенные копии изображения'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Количество комментариев'
+    )
+    is_visible = models.BooleanField(
+        default=False, editable=False, verbose_name='Видна в лентах'
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
+        # Индексы повторяют фильтр и сортировку лент: главной,
+        # категории и профиля. Django записывает is_visible=True как
+        # голое условие на столбец, поэтому флаг вынесен в условие
+        # частичного индекса: так SQLite находит индекс по WHERE запроса
+        indexes = (
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_visible=True),
+                name='post_visible_feed_idx'
+            ),
+            models.Index(
+                fields=('category', 'pub_date'),
+                condition=models.Q(is_visible=True),
+                name='post_visible_category_idx'
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_feed_idx'
+            ),
+            # Ближайшая отложенная публикация (blog/visibility.py)
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_published=True, is_visible=False),
+                name='post_scheduled_idx'
+            ),
+        )
+
+    def save(self, *args, **kwargs):
+        """
+        При обновлении не записывает денормализованные поля, чтобы не
+        затереть значения, изменённые параллельными запросами;
+        is_visible пересчитывается по текущим значениям полей и
+        записывается и тогда, когда update_fields задан вызывающим
+        """
+        self.is_visible = self.compute_visibility()
+        update_fields = kwargs.get('update_fields')
+        if (not self._state.adding and self.pk is not None
+                and not kwargs.get('force_insert')
+                and update_fields is None):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.DENORMALIZED_FIELDS
+            ]
+        elif (update_fields is not None
+                and set(update_fields) & set(self.VISIBILITY_FIELDS)
+                and 'is_visible' not in update_fields):
+            kwargs['update_fields'] = [*update_fields, 'is_visible']
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Запоминает загруженное имя изображения: после замены копии
+        старого удаляются (blog/signals.py)
+        """
+        instance = super().from_db(db, field_names, values)
+        image = instance.__dict__.get('image')
+        instance._loaded_image = getattr(image, 'name', image)
+        return instance
+
+    def compute_visibility(self, now=None):
+        """
+        Видимость по полям объекта; категория загружается, если она
+        ещё не получена вместе с публикацией
+        """
+        category = self.category
+        return (self.is_published and category is not None
+                and category.is_published
+                and self.pub_date <= (now or timezone.now()))
+
+    @property
+    def has_thumbnails(self):
+        """Уменьшенные копии построены для текущего изображения"""
+        return (bool(self.image)
+                and variants_ready(self.image_variants, self.image.name))
 
     def __str__(self):
         return (
             f'{(self.author.get_username())[:30]} - {self.title[:30]} '
             f'{self.text[:50]} - {self.pub_date} '
-            f'{self.location.name[:30]} - {self.category.title[:30]}'
+            f'{self.location.name[:30] if self.location else ""} - '
+            f'{self.category.title[:30] if self.category else ""}'
         )
 
 
@@ -162,3 +268,40 @@ class Comment(models.Model):
         verbose_name = 'коментарий'
         verbose_name_plural = 'коментарии'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_idx'
+            ),
+            # Навигация по датам в админке (date_hierarchy)
+            models.Index(
+                fields=('created_at',), name='comment_created_idx'
+            ),
+        )
+
+
+class PostSearchTerm(models.Model):
+    """
+    Слово публикации в инвертированном индексе поиска; используется,
+    если в базе нет FTS5
+    Атрибуты:
+            term (слово в нижнем регистре)
+            post (публикация, в которой встречается слово)
+            weight (число вхождений; вхождение в заголовок весит больше)
+    """
+
+    term = models.CharField(max_length=64, verbose_name='Слово')
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, verbose_name='Публикация',
+        related_name='search_terms'
+    )
+    weight = models.PositiveIntegerField(verbose_name='Вес')
+
+    class Meta:
+        verbose_name = 'слово поиска'
+        verbose_name_plural = 'Слова поиска'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('term', 'post'), name='post_search_term_unique'
+            ),
+        )
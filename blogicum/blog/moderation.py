@@ -0,0 +1,329 @@
+# Массовая модерация из админки: публикация, снятие с публикации, перенос
+# публикаций в категорию и удаление
+# Выбранные строки обрабатываются порциями по BATCH_SIZE первичных
+# ключей. На порцию — один UPDATE или DELETE с явно перечисленными
+# полями, без загрузки объектов и сигналов на каждую строку, и одна
+# запись журнала LogEntry с числом и id строк, в одной транзакции
+# То, что при сохранении объекта делают сигналы (blog/signals.py),
+# выполняется запросами на всю порцию: Post.is_visible пересчитывается
+# в том же UPDATE, счётчики комментариев уменьшаются одним UPDATE,
+# связанные строки и строки поискового индекса удаляются подзапросом,
+# копии изображений удалённых публикаций — после фиксации. Связи,
+# которые функции удаления обрабатывают сами, перечислены в
+# HANDLED_RELATIONS; DELETE по модели с другой связью не выполняется
+# Кэш страниц и чисел публикаций сбрасывается один раз после всех порций
+
+from django.contrib.admin.models import CHANGE, DELETION, LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Case, Count, Exists, F, OuterRef, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .cache import invalidate_page_cache
+from .images import remove_variants
+from .models import Category, Comment, Location, Post, PostSearchTerm
+from .search import COMMENT_FTS_TABLE, FTS_TABLE, unindex_rows
+from .visibility import invalidate_feeds, remember_next_publication
+
+BATCH_SIZE = 500
+OBJECT_REPR_LENGTH = LogEntry._meta.get_field('object_repr').max_length
+# Внешние ключи на модель, строки по которым удаляются или обнуляются
+# до DELETE её строк: (модель, поле)
+HANDLED_RELATIONS = {
+    Post: {(Comment, 'post'), (PostSearchTerm, 'post')},
+    Comment: set(),
+    PostSearchTerm: set(),
+    Category: {(Post, 'category')},
+    Location: {(Post, 'location')},
+}
+
+
+def pk_batches(queryset, batch_size=BATCH_SIZE):
+    """
+    Первичные ключи queryset порциями по возрастанию; каждая порция
+    выбирается по индексу pk после последнего ключа предыдущей, поэтому
+    изменение и удаление строк не сдвигают следующие порции
+    """
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    last = None
+    while True:
+        batch = list(
+            (pks if last is None else pks.filter(pk__gt=last))[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last = batch[-1]
+
+
+def log_batch(user, model, pks, count, action_flag, message):
+    """Одна запись журнала админки на порцию строк"""
+    opts = model._meta
+    LogEntry.objects.log_action(
+        user_id=user.pk,
+        content_type_id=ContentType.objects.get_for_model(model).pk,
+        object_id=None,
+        object_repr=(
+            f'{opts.verbose_name_plural}: {count} (id {pks[0]}–{pks[-1]})'
+        )[:OBJECT_REPR_LENGTH],
+        action_flag=action_flag,
+        change_message=f'{message}: {count}; id: '
+        + ', '.join(map(str, pks)),
+    )
+
+
+def apply_in_batches(user, queryset, operation, action_flag, message):
+    """
+    Выполняет operation(pks) над порциями queryset, каждую в своей
+    транзакции вместе с записью журнала; возвращает число строк,
+    которые изменила или удалила operation
+    """
+    total = 0
+    for pks in pk_batches(queryset, BATCH_SIZE):
+        with transaction.atomic():
+            count = operation(pks)
+            if count:
+                log_batch(
+                    user, queryset.model, pks, count, action_flag, message
+                )
+        total += count
+    return total
+
+
+def unhandled_relations(model):
+    """Внешние ключи на model, которых нет в HANDLED_RELATIONS"""
+    handled = HANDLED_RELATIONS.get(model, set())
+    return [
+        relation for relation in model._meta.related_objects
+        if (relation.related_model, relation.field.name) not in handled
+    ]
+
+
+def raw_delete(queryset):
+    """
+    DELETE одним запросом: без выборки объектов, каскадов и сигналов,
+    которые Collector выполняет для каждой строки. Связанные строки
+    удаляет вызывающая функция, поэтому модель с необработанной связью
+    не удаляется, чтобы не оставить строк без родителя
+    """
+    unhandled = unhandled_relations(queryset.model)
+    if unhandled:
+        raise RuntimeError(
+            'Удаление порциями не обрабатывает связи '
+            f'{queryset.model._meta.label}: '
+            + ', '.join(
+                f'{relation.related_model._meta.label}.'
+                f'{relation.field.name}' for relation in unhandled
+            )
+        )
+    return queryset._raw_delete(queryset.db)
+
+
+def published_category():
+    """Категория публикации из внешнего запроса опубликована"""
+    return Exists(Category.objects.filter(
+        pk=OuterRef('category_id'), is_published=True
+    ))
+
+
+def set_posts_published(user, queryset, is_published):
+    """Публикует или снимает с публикации публикации queryset"""
+    if is_published:
+        is_visible = Case(
+            When(
+                published_category(), pub_date__lte=timezone.now(),
+                then=Value(True)
+            ),
+            default=Value(False),
+        )
+    else:
+        is_visible = Value(False)
+
+    def operation(pks):
+        return Post.objects.filter(pk__in=pks).update(
+            is_published=is_published, is_visible=is_visible
+        )
+
+    total = apply_in_batches(
+        user, queryset, operation, CHANGE,
+        'Опубликовано' if is_published else 'Снято с публикации'
+    )
+    invalidate_feeds()
+    remember_next_publication()
+    return total
+
+
+def move_posts(user, queryset, category):
+    """Переносит публикации queryset в категорию category"""
+    if category.is_published:
+        is_visible = Case(
+            When(
+                is_published=True, pub_date__lte=timezone.now(),
+                then=Value(True)
+            ),
+            default=Value(False),
+        )
+    else:
+        is_visible = Value(False)
+
+    def operation(pks):
+        return Post.objects.filter(pk__in=pks).update(
+            category=category, is_visible=is_visible
+        )
+
+    total = apply_in_batches(
+        user, queryset, operation, CHANGE,
+        f'Перенесено в категорию «{category.title}»'
+    )
+    invalidate_feeds()
+    remember_next_publication()
+    return total
+
+
+def delete_post_batch(pks):
+    posts = Post.objects.filter(pk__in=pks)
+    comments = Comment.objects.filter(post__in=pks)
+    unindex_rows(COMMENT_FTS_TABLE, comments.values('pk'))
+    raw_delete(comments)
+    raw_delete(PostSearchTerm.objects.filter(post__in=pks))
+    unindex_rows(FTS_TABLE, posts.values('pk'))
+    remove_variants(*posts.exclude(image='').values_list('image', flat=True))
+    return raw_delete(posts)
+
+
+def delete_posts(user, queryset):
+    """Удаляет публикации queryset вместе с их комментариями"""
+    total = apply_in_batches(
+        user, queryset, delete_post_batch, DELETION, 'Удалено'
+    )
+    invalidate_feeds()
+    remember_next_publication()
+    return total
+
+
+def set_categories_published(user, queryset, is_published):
+    """
+    Публикует или скрывает категории queryset; видимость их публикаций
+    меняется вторым UPDATE той же порции
+    """
+    def operation(pks):
+        count = Category.objects.filter(pk__in=pks).update(
+            is_published=is_published
+        )
+        posts = Post.objects.filter(category__in=pks)
+        if is_published:
+            posts.filter(
+                is_published=True, pub_date__lte=timezone.now(),
+                is_visible=False
+            ).update(is_visible=True)
+        else:
+            posts.filter(is_visible=True).update(is_visible=False)
+        return count
+
+    total = apply_in_batches(
+        user, queryset, operation, CHANGE,
+        'Опубликовано' if is_published else 'Снято с публикации'
+    )
+    invalidate_feeds()
+    remember_next_publication()
+    return total
+
+
+def delete_category_batch(pks):
+    Post.objects.filter(category__in=pks).update(
+        category=None, is_visible=False
+    )
+    return raw_delete(Category.objects.filter(pk__in=pks))
+
+
+def delete_categories(user, queryset):
+    """Удаляет категории queryset; их публикации остаются без категории"""
+    total = apply_in_batches(
+        user, queryset, delete_category_batch, DELETION, 'Удалено'
+    )
+    invalidate_feeds()
+    remember_next_publication()
+    return total
+
+
+def set_locations_published(user, queryset, is_published):
+    """Публикует или скрывает местоположения queryset"""
+    def operation(pks):
+        return Location.objects.filter(pk__in=pks).update(
+            is_published=is_published
+        )
+
+    total = apply_in_batches(
+        user, queryset, operation, CHANGE,
+        'Опубликовано' if is_published else 'Снято с публикации'
+    )
+    invalidate_page_cache()
+    return total
+
+
+def delete_location_batch(pks):
+    Post.objects.filter(location__in=pks).update(location=None)
+    return raw_delete(Location.objects.filter(pk__in=pks))
+
+
+def delete_locations(user, queryset):
+    """Удаляет местоположения queryset; публикации остаются без них"""
+    total = apply_in_batches(
+        user, queryset, delete_location_batch, DELETION, 'Удалено'
+    )
+    invalidate_page_cache()
+    return total
+
+
+def delete_comment_batch(pks):
+    comments = Comment.objects.filter(pk__in=pks)
+    per_post = dict(
+        comments.order_by().values_list('post').annotate(Count('pk'))
+    )
+    if per_post:
+        Post.objects.filter(pk__in=per_post).update(comment_count=Greatest(
+            F('comment_count') - Case(
+                *(When(pk=post, then=Value(count))
+                  for post, count in per_post.items()),
+                default=Value(0),
+            ),
+            0,
+        ))
+    unindex_rows(COMMENT_FTS_TABLE, comments.values('pk'))
+    return raw_delete(comments)
+
+
+def delete_comments(user, queryset):
+    """
+    Удаляет комментарии queryset; счётчики их публикаций уменьшаются
+    одним UPDATE на порцию
+    """
+    total = apply_in_batches(
+        user, queryset, delete_comment_batch, DELETION, 'Удалено'
+    )
+    invalidate_page_cache()
+    return total
+
+
+PUBLISHERS = {
+    Post: set_posts_published,
+    Category: set_categories_published,
+    Location: set_locations_published,
+}
+DELETERS = {
+    Post: delete_posts,
+    Category: delete_categories,
+    Location: delete_locations,
+    Comment: delete_comments,
+}
+
+
+def set_published(user, queryset, is_published):
+    """Меняет is_published строк queryset; возвращает их число"""
+    return PUBLISHERS[queryset.model](user, queryset, is_published)
+
+
+def delete(user, queryset):
+    """Удаляет строки queryset; возвращает их число"""
+    return DELETERS[queryset.model](user, queryset)
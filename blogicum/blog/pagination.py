@@ -0,0 +1,179 @@
+# Курсорная (keyset) пагинация
+# Страница выбирается по значениям полей сортировки крайней записи,
+# а не по смещению, поэтому глубокие страницы не требуют COUNT(*) и OFFSET
+# Курсор непрозрачен для клиента: это base64 от направления и значений полей
+# FeedPaginator — обычная пагинация по номеру, которая может взять общее
+# число записей снаружи (из кэша) вместо COUNT(*)
+
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import Q
+
+CURSOR_PARAM = 'cursor'
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+# Окно номеров страниц: по две страницы вокруг текущей и по одной с краёв
+PAGE_WINDOW_ON_EACH_SIDE = 2
+PAGE_WINDOW_ON_ENDS = 1
+
+
+class InvalidCursor(InvalidPage):
+    """Курсор не удалось разобрать"""
+
+
+class FeedPaginator(Paginator):
+    """
+    Пагинатор ленты; с count не выполняет COUNT(*), а берёт готовое
+    число записей
+    """
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, count=None):
+        super().__init__(object_list, per_page, orphans,
+                         allow_empty_first_page)
+        if count is not None:
+            # Заполняет cached_property Paginator.count
+            self.__dict__['count'] = count
+
+
+class CursorPage(Sequence):
+    """
+    Страница курсорного пагинатора
+    Повторяет интерфейс django.core.paginator.Page, насколько это возможно
+    без общего количества записей
+    """
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Пагинатор по ключу сортировки
+    Последнее поле ordering должно быть уникальным (обычно pk),
+    иначе записи с одинаковыми значениями могут потеряться между страницами
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-')) for name in self.ordering
+        ]
+
+    def _get_field(self, name):
+        opts = self.queryset.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def encode_cursor(self, obj, direction):
+        """Кодирует позицию записи obj в непрозрачную строку"""
+        values = [
+            self._get_field(name).value_to_string(obj)
+            for name, _ in self.fields
+        ]
+        raw = json.dumps([direction, values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Возвращает направление и значения полей, записанные в курсоре"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, values = json.loads(
+                base64.urlsafe_b64decode(padded.encode())
+            )
+            if direction not in (FORWARD, BACKWARD):
+                raise ValueError(direction)
+            if len(values) != len(self.fields):
+                raise ValueError(values)
+            values = [
+                self._get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, values)
+            ]
+        except (
+            binascii.Error, FieldDoesNotExist, TypeError, UnicodeError,
+            ValidationError, ValueError
+        ):
+            raise InvalidCursor('Некорректный курсор')
+        if any(value is None for value in values):
+            raise InvalidCursor('Некорректный курсор')
+        return direction, values
+
+    def _seek_filter(self, values, backward):
+        """
+        Условие «строго после позиции» для составного ключа сортировки:
+        (a < x) OR (a = x AND b < y) для убывающих полей
+        """
+        condition = None
+        for (name, descending), value in reversed(
+            list(zip(self.fields, values))
+        ):
+            lookup = 'lt' if descending != backward else 'gt'
+            step = Q(**{f'{name}__{lookup}': value})
+            if condition is not None:
+                step |= Q(**{name: value}) & condition
+            condition = step
+        return condition
+
+    def get_page(self, cursor=None):
+        """Возвращает страницу, следующую за позицией курсора"""
+        if not cursor:
+            direction, values = FORWARD, None
+        else:
+            direction, values = self.decode_cursor(cursor)
+        backward = direction == BACKWARD
+
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, backward))
+        if backward:
+            queryset = queryset.order_by(*(
+                name if descending else f'-{name}'
+                for name, descending in self.fields
+            ))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backward:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(rows[-1], FORWARD)
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(rows[0], BACKWARD)
+        return CursorPage(rows, self, next_cursor, previous_cursor)
@@ -0,0 +1,288 @@
+# Полнотекстовый поиск по заголовку и тексту публикаций
+# На SQLite с FTS5 индекс — виртуальная таблица blog_post_fts (миграция
+# 0022), строка которой имеет rowid публикации; ранжирует bm25 с большим
+# весом заголовка
+# Без FTS5 используется инвертированный индекс в таблице PostSearchTerm:
+# по уникальному индексу (term, post) находятся публикации со всеми
+# словами запроса, ранг — сумма весов слов
+# Индекс обновляется сигналом после сохранения публикации; при удалении
+# строки PostSearchTerm удаляются каскадно, а строка FTS5 — сигналом
+# Результаты ограничены видимыми публикациями (Post.is_visible);
+# filter_matching ищет среди всех публикаций для поиска в админке
+# Текст комментариев индексируется в blog_comment_fts для поиска в
+# админке; без FTS5 поиск по нему сводится к icontains
+# Массовое удаление в админке (blog/moderation.py) удаляет строки FTS5
+# порциями через unindex_rows
+
+import re
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Count, Q, Sum
+from django.db.models.expressions import RawSQL
+
+from .models import Post, PostSearchTerm
+
+FTS_TABLE = 'blog_post_fts'
+COMMENT_FTS_TABLE = 'blog_comment_fts'
+FTS_TABLES = {FTS_TABLE, COMMENT_FTS_TABLE}
+
+# Вес вхождения слова в заголовок относительно вхождения в текст
+TITLE_WEIGHT = 10
+# Слова запроса сверх этого числа не учитываются
+MAX_QUERY_TERMS = 8
+TERM_LENGTH = PostSearchTerm._meta.get_field('term').max_length
+# Буквы и цифры, как их выделяет токенизатор unicode61
+WORD = re.compile(r'[^\W_]+')
+
+RANKED_FTS_SQL = (
+    f'SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE} '
+    f'JOIN blog_post ON blog_post.id = {FTS_TABLE}.rowid '
+    f'WHERE {FTS_TABLE} MATCH %s AND blog_post.is_visible '
+    f'ORDER BY bm25({FTS_TABLE}, {TITLE_WEIGHT}.0, 1.0), '
+    f'blog_post.pub_date DESC LIMIT %s OFFSET %s'
+)
+MATCHING_FTS_SQL = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+MATCHING_COMMENTS_SQL = (
+    f'SELECT rowid FROM {COMMENT_FTS_TABLE} '
+    f'WHERE {COMMENT_FTS_TABLE} MATCH %s'
+)
+COUNT_FTS_SQL = (
+    f'SELECT COUNT(*) FROM {FTS_TABLE} '
+    f'JOIN blog_post ON blog_post.id = {FTS_TABLE}.rowid '
+    f'WHERE {FTS_TABLE} MATCH %s AND blog_post.is_visible'
+)
+
+# Таблицы FTS5, найденные в каждой базе
+_fts_tables = {}
+
+
+def has_fts(using=DEFAULT_DB_ALIAS, table=FTS_TABLE):
+    """Есть ли в базе using таблица FTS5 table; проверяется один раз"""
+    if using not in _fts_tables:
+        connection = connections[using]
+        _fts_tables[using] = (
+            FTS_TABLES & set(connection.introspection.table_names())
+            if connection.vendor == 'sqlite' else set()
+        )
+    return table in _fts_tables[using]
+
+
+def tokenize(text):
+    """Слова текста в нижнем регистре"""
+    return [word[:TERM_LENGTH] for word in WORD.findall(text.casefold())]
+
+
+def parse_query(query):
+    """Уникальные слова запроса в порядке появления"""
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+def match_expression(terms):
+    """Выражение MATCH для FTS5: все слова запроса как фразы"""
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def term_matches(terms, using=DEFAULT_DB_ALIAS):
+    """
+    Публикации инвертированного индекса, содержащие все слова, с суммой
+    весов слов (score)
+    """
+    return (
+        PostSearchTerm.objects.using(using)
+        .filter(term__in=terms)
+        .values('post')
+        .annotate(matched=Count('pk'), score=Sum('weight'))
+        .filter(matched=len(terms))
+    )
+
+
+def filter_matching(queryset, query):
+    """
+    Публикации queryset, содержащие все слова запроса, без учёта
+    видимости и ранга; совпадения выбираются подзапросом по индексу
+    """
+    terms = parse_query(query)
+    if not terms:
+        return queryset.none()
+    if has_fts(queryset.db):
+        matching = RawSQL(MATCHING_FTS_SQL, [match_expression(terms)])
+    else:
+        matching = term_matches(terms, queryset.db).values('post')
+    return queryset.filter(pk__in=matching)
+
+
+def comment_text_q(query, using=DEFAULT_DB_ALIAS):
+    """
+    Условие на комментарии, текст которых содержит все слова запроса:
+    подзапрос к FTS5 или, без неё, icontains по каждому слову
+    """
+    terms = parse_query(query)
+    if not terms:
+        return Q(pk__in=[])
+    if has_fts(using, COMMENT_FTS_TABLE):
+        return Q(pk__in=RawSQL(
+            MATCHING_COMMENTS_SQL, [match_expression(terms)]
+        ))
+    return Q(*(Q(text__icontains=term) for term in terms))
+
+
+def post_terms(post):
+    """Веса слов публикации для инвертированного индекса"""
+    weights = Counter(tokenize(post.text))
+    for term in tokenize(post.title):
+        weights[term] += TITLE_WEIGHT
+    return weights
+
+
+def index_post(post):
+    """Заменяет записи публикации в поисковом индексе её базы"""
+    using = post._state.db or DEFAULT_DB_ALIAS
+    if has_fts(using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {FTS_TABLE}(rowid, title, text) '
+                'VALUES (%s, %s, %s)', [post.pk, post.title, post.text]
+            )
+        return
+    PostSearchTerm.objects.using(using).filter(post=post).delete()
+    PostSearchTerm.objects.using(using).bulk_create(
+        PostSearchTerm(post=post, term=term, weight=weight)
+        for term, weight in post_terms(post).items()
+    )
+
+
+def unindex_post(post_id, using=DEFAULT_DB_ALIAS):
+    """Удаляет публикацию из таблицы FTS5"""
+    if has_fts(using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+
+def unindex_rows(table, ids, using=DEFAULT_DB_ALIAS):
+    """
+    Удаляет из таблицы FTS5 строки, rowid которых выбирает ids —
+    queryset.values('pk'); одним DELETE с подзапросом
+    """
+    if has_fts(using, table):
+        sql, params = ids.order_by().query.sql_with_params()
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE rowid IN ({sql})', params
+            )
+
+
+def index_comment(comment):
+    """Заменяет текст комментария в таблице FTS5"""
+    using = comment._state.db or DEFAULT_DB_ALIAS
+    if has_fts(using, COMMENT_FTS_TABLE):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {COMMENT_FTS_TABLE}(rowid, text) '
+                'VALUES (%s, %s)', [comment.pk, comment.text]
+            )
+
+
+def unindex_comment(comment_id, using=DEFAULT_DB_ALIAS):
+    """Удаляет комментарий из таблицы FTS5"""
+    if has_fts(using, COMMENT_FTS_TABLE):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {COMMENT_FTS_TABLE} WHERE rowid = %s',
+                [comment_id]
+            )
+
+
+def rebuild_index(using=DEFAULT_DB_ALIAS, chunk_size=2000):
+    """
+    Строит индексы публикаций и комментариев заново; возвращает число
+    публикаций
+    """
+    if has_fts(using, COMMENT_FTS_TABLE):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {COMMENT_FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {COMMENT_FTS_TABLE}(rowid, text) '
+                'SELECT id, text FROM blog_comment'
+            )
+    posts = Post.objects.using(using).order_by('pk')
+    if has_fts(using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE}(rowid, title, text) '
+                'SELECT id, title, text FROM blog_post'
+            )
+        return posts.count()
+    PostSearchTerm.objects.using(using).all().delete()
+    total = 0
+    batch = []
+    for post in posts.only('pk', 'title', 'text').iterator(chunk_size):
+        total += 1
+        batch.extend(
+            PostSearchTerm(post=post, term=term, weight=weight)
+            for term, weight in post_terms(post).items()
+        )
+        if len(batch) >= chunk_size:
+            PostSearchTerm.objects.using(using).bulk_create(batch)
+            batch = []
+    PostSearchTerm.objects.using(using).bulk_create(batch)
+    return total
+
+
+class SearchResults:
+    """
+    Ранжированные результаты поиска видимых публикаций
+    Поддерживает count() и срезы, поэтому подходит для Paginator; срез
+    выбирает ранжированные id и загружает публикации из queryset
+    (get_posts_with_comments) одним запросом
+    """
+
+    def __init__(self, query, queryset):
+        self.terms = parse_query(query)
+        self.queryset = queryset
+        # База чтения queryset: с включёнными репликами — реплика
+        self.using = queryset.db
+
+    def _term_posts(self):
+        """Видимые публикации, содержащие все слова запроса"""
+        return term_matches(self.terms, self.using).filter(
+            post__is_visible=True
+        )
+
+    def count(self):
+        if not self.terms:
+            return 0
+        if not has_fts(self.using):
+            return self._term_posts().count()
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(COUNT_FTS_SQL, [match_expression(self.terms)])
+            return cursor.fetchone()[0]
+
+    def ranked_ids(self, offset, limit):
+        """Идентификаторы публикаций в порядке ранга"""
+        if not self.terms or limit <= 0:
+            return []
+        if not has_fts(self.using):
+            return list(
+                self._term_posts().order_by('-score', '-post')
+                .values_list('post', flat=True)[offset:offset + limit]
+            )
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                RANKED_FTS_SQL, [match_expression(self.terms), limit, offset]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        ids = self.ranked_ids(start, index.stop - start)
+        posts = self.queryset.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
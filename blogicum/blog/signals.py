@@ -0,0 +1,193 @@
+# Обработчики сигналов блога
+# Счётчик Post.comment_count меняется одним атомарным UPDATE на каждое
+# создание, перенос и удаление комментария, включая каскадные удаления;
+# loaddata (raw) пересчитывает его по фактическому числу комментариев
+# Любое изменение отображаемых данных сбрасывает кэш страниц
+# Изменения публикаций и категорий сбрасывают кэш чисел публикаций лент
+# Новое изображение публикации ставится в очередь на построение копий;
+# копии заменённого изображения и удалённой публикации удаляются
+# Скрытие и публикация категории пересчитывают Post.is_visible её
+# публикаций; отложенная публикация запоминает время своего показа
+# Сохранение и удаление публикаций и комментариев обновляют поисковый
+# индекс
+
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate_feed_counts, invalidate_page_cache
+from .counts import actual_comment_count
+from .images import remove_variants, schedule_post_image
+from .models import Category, Comment, Location, Post, User
+from .search import (
+    index_comment, index_post, unindex_comment, unindex_post
+)
+from .visibility import (
+    remember_next_publication, schedule_publication, sync_visibility
+)
+
+
+def change_comment_count(post_id, delta):
+    """Атомарно изменяет счётчик комментариев публикации на delta"""
+    Post.objects.filter(pk=post_id).update(
+        comment_count=Greatest(F('comment_count') + delta, 0)
+    )
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_post(sender, instance, raw, **kwargs):
+    """Запоминает публикацию комментария до сохранения (перенос в админке)"""
+    if raw or instance._state.adding:
+        instance._previous_post_id = None
+        return
+    instance._previous_post_id = (
+        Comment.objects.filter(pk=instance.pk)
+        .values_list('post_id', flat=True).first()
+    )
+
+
+def recount_post_comments(post_id, using):
+    """Записывает в счётчик фактическое число комментариев публикации"""
+    Post.objects.using(using).filter(pk=post_id).update(
+        comment_count=actual_comment_count()
+    )
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw, using, **kwargs):
+    """
+    Увеличивает счётчик новой публикации комментария; после loaddata
+    счётчик пересчитывается, так как строка могла существовать
+    """
+    if raw:
+        recount_post_comments(instance.post_id, using)
+        return
+    previous_post_id = getattr(instance, '_previous_post_id', None)
+    if created:
+        change_comment_count(instance.post_id, 1)
+    elif previous_post_id and previous_post_id != instance.post_id:
+        change_comment_count(previous_post_id, -1)
+        change_comment_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, origin=None, **kwargs):
+    """Уменьшает счётчик, если публикация не удаляется вместе с комментарием"""
+    if isinstance(origin, Post) and origin.pk == instance.post_id:
+        return
+    change_comment_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_delete, sender=User)
+def invalidate_pages(sender, **kwargs):
+    """Сбрасывает кэш страниц после изменения данных блога"""
+    invalidate_page_cache()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_counts(sender, **kwargs):
+    """
+    Создание, удаление, смена статуса, даты или категории публикации
+    и скрытие категории меняют число публикаций в лентах
+    """
+    invalidate_feed_counts()
+
+
+@receiver(post_save, sender=User)
+def invalidate_pages_on_profile_change(sender, update_fields, **kwargs):
+    """Вход пользователя обновляет только last_login и кэш не сбрасывает"""
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        invalidate_page_cache()
+
+
+@receiver(post_save, sender=Post)
+def schedule_post_publication(sender, instance, raw, using, **kwargs):
+    """
+    Отложенная публикация будет показана первым запросом после pub_date
+    loaddata сохраняет публикацию в обход Post.save, поэтому видимость
+    и число комментариев (в файле оно может устареть) считаются запросом
+    """
+    if raw:
+        sync_visibility(Post.objects.filter(pk=instance.pk))
+        recount_post_comments(instance.pk, using)
+    if instance.is_published and instance.pub_date > timezone.now():
+        schedule_publication(instance.pub_date)
+
+
+@receiver(post_save, sender=Category)
+def sync_category_posts(sender, instance, created, raw, **kwargs):
+    """Статус категории меняет видимость всех её публикаций"""
+    if created and not raw:
+        return
+    sync_visibility(instance.posts.all())
+    remember_next_publication()
+
+
+@receiver(post_delete, sender=Category)
+def hide_uncategorized_posts(sender, **kwargs):
+    """Публикации удалённой категории остаются без категории и скрываются"""
+    sync_visibility(Post.objects.filter(category=None, is_visible=True))
+
+
+@receiver(post_save, sender=Post)
+def schedule_thumbnails(sender, instance, raw, **kwargs):
+    """Строит уменьшенные копии нового изображения после фиксации"""
+    if not raw and instance.image and not instance.has_thumbnails:
+        schedule_post_image(instance)
+
+
+@receiver(post_save, sender=Post)
+def remove_replaced_variants(sender, instance, raw, update_fields,
+                             **kwargs):
+    """Удаляет копии изображения, которое заменили или убрали"""
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    loaded = getattr(instance, '_loaded_image', None)
+    if not raw and loaded and loaded != instance.image.name:
+        remove_variants(loaded)
+    instance._loaded_image = instance.image.name
+
+
+@receiver(post_delete, sender=Post)
+def remove_deleted_variants(sender, instance, **kwargs):
+    """Удаляет копии изображения удалённой публикации"""
+    remove_variants(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, update_fields, **kwargs):
+    """Переиндексирует публикацию, если могли измениться заголовок и текст"""
+    if update_fields is None or {'title', 'text'} & set(update_fields):
+        index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, using, **kwargs):
+    """Удаляет публикацию из поискового индекса"""
+    unindex_post(instance.pk, using)
+
+
+@receiver(post_save, sender=Comment)
+def index_saved_comment(sender, instance, update_fields, **kwargs):
+    """Переиндексирует текст комментария"""
+    if update_fields is None or 'text' in update_fields:
+        index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_deleted_comment(sender, instance, using, **kwargs):
+    """Удаляет комментарий из поискового индекса"""
+    unindex_comment(instance.pk, using)
@@ -0,0 +1,74 @@
+# Теги шаблонов блога
+# post_image выводит изображение публикации с srcset из уменьшенных копий,
+# размерами и отложенной загрузкой
+# post_cards отрисовывает карточки ленты, беря готовые из кэша одним
+# get_many и сохраняя новые одним set_many
+# page_window возвращает ограниченное окно номеров страниц для пагинатора
+
+from django import template
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from ..cache import get_page_cache, post_card_key
+from ..images import variant_srcsets
+from ..pagination import PAGE_WINDOW_ON_EACH_SIDE, PAGE_WINDOW_ON_ENDS
+
+register = template.Library()
+
+# Карточка публикации не шире 40rem
+CARD_IMAGE_SIZES = '(max-width: 640px) 100vw, 640px'
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, sizes=CARD_IMAGE_SIZES):
+    """
+    Пока копии не построены, выводится только оригинал;
+    srcset оригинала всегда идёт последним
+    """
+    context = {'post': post, 'sizes': sizes, 'sources': [], 'srcset': ''}
+    if post.has_thumbnails:
+        srcsets = variant_srcsets(
+            post.image.name, post.image_variants['width']
+        )
+        context['sources'] = [item for item in srcsets if item[0]]
+        context['srcset'] = srcsets[-1][1]
+    return context
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Список HTML карточек публикаций в исходном порядке"""
+    posts = list(posts)
+    timeout = getattr(settings, 'BLOG_CARD_CACHE_TIMEOUT', 0)
+    if not timeout:
+        return [render_post_card(post) for post in posts]
+
+    cache = get_page_cache()
+    keys = [post_card_key(post) for post in posts]
+    cached = cache.get_many(keys)
+    missing = {
+        key: render_post_card(post)
+        for key, post in zip(keys, posts) if key not in cached
+    }
+    if missing:
+        cache.set_many(missing, timeout)
+    return [mark_safe(cached.get(key) or missing[key]) for key in keys]
+
+
+def render_post_card(post):
+    return mark_safe(
+        render_to_string('includes/post_card.html', {'post': post})
+    )
+
+
+@register.simple_tag
+def page_window(page_obj):
+    """
+    Номера страниц вокруг текущей, первая и последняя; пропуски
+    обозначены paginator.ELLIPSIS. Работает с любым Paginator Django
+    """
+    return list(page_obj.paginator.get_elided_page_range(
+        page_obj.number, on_each_side=PAGE_WINDOW_ON_EACH_SIDE,
+        on_ends=PAGE_WINDOW_ON_ENDS
+    ))
@@ -1,15 +1,19 @@
 # Добавлены пути, связанные с возможностью авторизации
 # Действия с постами, комментариями, профилем
+# Выгрузка данных в NDJSON для сотрудников
+# Поиск по публикациям
+# JSON API лент и страницы публикации (blog/api.py)
 
 from django.urls import path
 
-from . import views
+from . import api, views
 
 
 app_name = 'blog'
 
 urlpatterns = [
     path('', views.PostListView.as_view(), name='index'),
+    path('search/', views.PostSearchView.as_view(), name='search'),
     path('posts/<int:post_id>/', views.PostDetailView.as_view(),
          name='post_detail'),
     path('category/<slug:category_slug>/', views.PostCategoryView.as_view(),
@@ -26,10 +30,22 @@ urlpatterns = [
          name='edit_profile'),
     path('posts/<int:post_id>/comment/', views.CommentCreateView.as_view(),
          name='add_comment'),
+    path('posts/<int:post_id>/comments/', views.PostCommentsView.as_view(),
+         name='post_comments'),
     path('posts/<int:post_id>/edit_comment/<int:comment_id>/',
          views.CommentUpdateView.as_view(),
          name='edit_comment'),
     path('posts/<int:post_id>/delete_comment/<int:comment_id>/',
          views.CommentDeleteView.as_view(),
-         name='delete_comment')
+         name='delete_comment'),
+    path('export/', views.ExportView.as_view(), name='export'),
+    path('api/posts/', api.FeedApiView.as_view(), name='api_posts'),
+    path('api/posts/<int:post_id>/', api.PostApiView.as_view(),
+         name='api_post_detail'),
+    path('api/posts/<int:post_id>/comments/',
+         api.PostCommentsApiView.as_view(), name='api_post_comments'),
+    path('api/category/<slug:category_slug>/',
+         api.CategoryFeedApiView.as_view(), name='api_category_posts'),
+    path('api/profile/<str:username>/', api.ProfileFeedApiView.as_view(),
+         name='api_profile'),
 ]
@@ -1,112 +1,252 @@
 # Настраиваем пагинатор на 10 позиций
 # Пагинатор на главную, страницу пользователя и страницу категории
 # Для реализации функций используем FBV, CBV, миксины
-
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.paginator import Paginator
-from django.db.models import Count
+# Главная лента дополнительно поддерживает курсорную пагинацию (?cursor=)
+# Ленты и страница публикации кэшируются для анонимных читателей
+# Сотрудникам доступна потоковая выгрузка данных в NDJSON (blog/export.py)
+# Представления с replica_reads = True читают данные с реплик
+# Ленты показывают публикации с Post.is_visible (blog/visibility.py)
+# Поиск по заголовку и тексту публикаций (blog/search.py)
+
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.mixins import (
+    LoginRequiredMixin, UserPassesTestMixin
+)
+from django.db import DEFAULT_DB_ALIAS
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
 from django.utils import timezone
 from django.views.generic import (
-    DeleteView, DetailView, ListView, CreateView, UpdateView
+    DeleteView, DetailView, ListView, CreateView, TemplateView, UpdateView,
+    View
 )
 
+from blogicum.routers import replica_reads_active
+
+from .cache import AnonymousPageCacheMixin, get_feed_count
+from .export import ExportError, iter_ndjson, parse_models, parse_since
 from .models import Category, Comment, Post, User
 from .forms import CommentForm, PostForm, UserForm
+from .pagination import (
+    CURSOR_PARAM, CursorPaginator, FeedPaginator, InvalidCursor
+)
+from .search import SearchResults
+from .visibility import publish_due
 
 PAGINATOR_POST = 10
 PAGINATOR_CATEGORY = 10
 PAGINATOR_PROFILE = 10
+PAGINATOR_COMMENTS = 50
+PAGINATOR_SEARCH = 10
 
-
-def get_page_obj(request, queryset, per_page):
-    """Возвращает страницу пагинатора для заданного queryset."""
-    paginator = Paginator(queryset, per_page)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+# Порядок ленты: Post.Meta.ordering, равные даты различаются по id,
+# чтобы страницы по номеру и по курсору совпадали
+FEED_ORDERING = (*Post._meta.ordering, '-pk')
+COMMENT_ORDERING = (*Comment._meta.ordering, 'pk')
 
 
-def get_posts_with_comments(
-    queryset=None, *, filter_published=True, annotate_comments=True
-):
+def get_posts_with_comments(queryset=None, *, filter_published=True):
     """
-    Дополняет посты количеством комментариев и при необходимости
-    фильтрует по опубликованности.
+    Подгружает связанные объекты постов и при необходимости фильтрует
+    по опубликованности. Количество комментариев хранится в
+    Post.comment_count, поэтому JOIN с комментариями не нужен.
+    Опубликованность с учётом категории и даты хранит Post.is_visible.
     """
     if queryset is None:
         queryset = Post.objects.all()
 
     queryset = queryset.select_related('author', 'location', 'category')
 
-    if annotate_comments:
-        queryset = queryset.annotate(comment_count=Count('comments'))
-
     if filter_published:
-        queryset = queryset.filter(
-            is_published=True,
-            category__is_published=True,
-            pub_date__lte=timezone.now()
-        )
+        queryset = queryset.filter(is_visible=True)
+
+    return queryset.order_by(*FEED_ORDERING)
+
+
+class ScheduledPublishingMixin:
+    """
+    Показывает наступившие отложенные публикации до обращения к кэшу
+    страниц, чтобы лента не отставала от pub_date
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        publish_due()
+        return super().dispatch(request, *args, **kwargs)
 
-    return queryset.order_by(*Post._meta.ordering)
 
+class FeedPaginationMixin:
+    """
+    Пагинация лент по номеру страницы; число публикаций берётся из кэша
+    по имени из get_count_name, чтобы пагинатор не выполнял COUNT(*)
+    """
 
-class PostListView(ListView):
+    paginator_class = FeedPaginator
+
+    def get_count_name(self):
+        """Имя ленты в кэше чисел публикаций; None отключает кэш"""
+        return None
+
+    def get_total_count(self, queryset):
+        """Число публикаций ленты или None, чтобы посчитать его запросом"""
+        name = self.get_count_name()
+        if name is None:
+            return None
+        return get_feed_count(name, queryset)
+
+    def get_paginator(self, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True, **kwargs):
+        return self.paginator_class(
+            queryset, per_page, orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+            count=self.get_total_count(queryset), **kwargs
+        )
+
+
+class PostListView(ScheduledPublishingMixin, AnonymousPageCacheMixin,
+                   FeedPaginationMixin, ListView):
     """Представление для отображения списка публикаций на главной странице"""
 
     paginate_by = PAGINATOR_POST
     template_name = 'blog/index.html'
+    replica_reads = True
+
+    def use_cursor(self):
+        """
+        Курсорный режим включается параметром ?cursor= или настройкой
+        BLOG_FEED_CURSOR_PAGINATION; ссылки вида ?page=N работают всегда
+        """
+        if CURSOR_PARAM in self.request.GET:
+            return True
+        return (getattr(settings, 'BLOG_FEED_CURSOR_PAGINATION', False)
+                and 'page' not in self.request.GET)
 
     def get_queryset(self):
         """Получение списка публикаций с использованием фильтрации"""
         return get_posts_with_comments()
 
+    def get_count_name(self):
+        """Общая лента одна для всех читателей"""
+        return 'index'
+
+    def paginate_queryset(self, queryset, page_size):
+        """Пагинация по ключу (pub_date, id) без COUNT(*) и OFFSET"""
+        if not self.use_cursor():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(
+            queryset, page_size, ordering=FEED_ORDERING
+        )
+        try:
+            page = paginator.get_page(self.request.GET.get(CURSOR_PARAM))
+        except InvalidCursor as error:
+            raise Http404(str(error))
+        return paginator, page, page.object_list, page.has_other_pages()
 
-class PostDetailView(DetailView):
+    def get_context_data(self, **kwargs):
+        """Шаблон выбирает вариант пагинатора по флагу cursor_pagination"""
+        return dict(
+            **super().get_context_data(**kwargs),
+            cursor_pagination=self.use_cursor()
+        )
+
+
+def is_post_published(post):
+    """
+    Проверка статуса публикации на уже загруженном объекте; повторяет
+    фильтр get_posts_with_comments, включая пост без категории
+    """
+    return (
+        post.is_published
+        and post.category is not None
+        and post.category.is_published
+        and post.pub_date <= timezone.now()
+    )
+
+
+def get_visible_post(request, post_id):
+    """
+    Получение публикации с учётом её статуса публикации одним запросом.
+    Автор видит даже неопубликованные публикации. Автору и при отсутствии
+    публикации на отстающей реплике она перечитывается с основной базы
+    """
+    queryset = Post.objects.select_related('category', 'location', 'author')
+    post = queryset.filter(pk=post_id).first()
+    if replica_reads_active() and (
+        post is None or post.author_id == request.user.pk
+    ):
+        post = queryset.using(DEFAULT_DB_ALIAS).filter(pk=post_id).first()
+    if post is None:
+        raise Http404
+    if post.author_id != request.user.pk and not is_post_published(post):
+        raise Http404
+    return post
+
+
+def get_comments_page(post, cursor=None):
+    """Страница комментариев по ключу (created_at, id)"""
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        PAGINATOR_COMMENTS,
+        ordering=COMMENT_ORDERING
+    )
+    try:
+        return paginator.get_page(cursor)
+    except InvalidCursor as error:
+        raise Http404(str(error))
+
+
+class PostDetailView(AnonymousPageCacheMixin, DetailView):
     """Представление для отображения деталей конкретной публикации"""
 
     model = Post
     template_name = 'blog/detail.html'
+    replica_reads = True
     pk_url_kwarg = 'post_id'
 
     def get_context_data(self, **kwargs):
         """
-        Дополнение контекста данными о комментариях и формой для добавления
-                                                                    комментариев
+        Дополнение контекста первой страницей комментариев и формой для
+                                                    добавления комментариев
         """
         return dict(
             **super().get_context_data(**kwargs),
             form=CommentForm(),
-            comments=self.object.comments.select_related('author')
+            comments=get_comments_page(self.object)
         )
 
     def get_object(self):
-        """
-        Получение объекта публикации с учётом её статуса публикации.
-        Автор видит даже неопубликованные публикации
-        """
-        post = get_object_or_404(
-            Post.objects.select_related('category', 'location', 'author'),
-            pk=self.kwargs["post_id"],
-        )
-        if (not self.request.user.is_authenticated
-                or self.request.user != post.author):
-            post = get_object_or_404(
-                Post.objects.select_related('category', 'location', 'author'),
-                pk=self.kwargs["post_id"],
-                is_published=True,
-                category__is_published=True,
-                pub_date__lte=timezone.now(),
+        """Получение публикации, видимой текущему пользователю"""
+        return get_visible_post(self.request, self.kwargs['post_id'])
+
+
+class PostCommentsView(AnonymousPageCacheMixin, TemplateView):
+    """Следующие страницы комментариев публикации в виде HTML-фрагмента"""
+
+    template_name = 'includes/comments_page.html'
+    replica_reads = True
+
+    def get_context_data(self, **kwargs):
+        """Страница комментариев после курсора из ?cursor="""
+        post = get_visible_post(self.request, self.kwargs['post_id'])
+        return dict(
+            **super().get_context_data(**kwargs),
+            post=post,
+            comments=get_comments_page(
+                post, self.request.GET.get(CURSOR_PARAM)
             )
-        return post
+        )
 
 
-class PostCategoryView(ListView):
+class PostCategoryView(ScheduledPublishingMixin, AnonymousPageCacheMixin,
+                       FeedPaginationMixin, ListView):
     """Представление для отображения списка публикаций в категории"""
 
     model = Post
     template_name = 'blog/category.html'
+    replica_reads = True
     context_object_name = 'page_obj'
     paginate_by = PAGINATOR_CATEGORY
 
@@ -119,6 +259,10 @@ class PostCategoryView(ListView):
         )
         return get_posts_with_comments(self.category.posts.all())
 
+    def get_count_name(self):
+        """Число публикаций хранится отдельно для каждой категории"""
+        return f'category:{self.category.slug}'
+
     def get_context_data(self, **kwargs):
         """Добавление информации о категории в контекст"""
         return dict(
@@ -127,6 +271,38 @@ class PostCategoryView(ListView):
         )
 
 
+class PostSearchView(ScheduledPublishingMixin, FeedPaginationMixin,
+                     ListView):
+    """
+    Поиск по заголовку и тексту видимых публикаций, результаты по рангу
+    Страницы не кэшируются целиком: ключ кэша не учитывает запрос
+    """
+
+    template_name = 'blog/search.html'
+    paginate_by = PAGINATOR_SEARCH
+    replica_reads = True
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        return SearchResults(self.query, get_posts_with_comments())
+
+    def get_count_name(self):
+        """Число результатов кэшируется по словам запроса"""
+        digest = hashlib.md5(
+            ' '.join(self.object_list.terms).encode(),
+            usedforsecurity=False
+        ).hexdigest()
+        return f'search:{digest}'
+
+    def get_context_data(self, **kwargs):
+        """Запрос сохраняется в ссылках пагинатора"""
+        return dict(
+            **super().get_context_data(**kwargs),
+            query=self.query,
+            page_query=f'{urlencode({"q": self.query})}&'
+        )
+
+
 class PostCreateView(LoginRequiredMixin, CreateView):
     """Представление для создания публикации"""
 
@@ -161,15 +337,22 @@ class PostMixin(LoginRequiredMixin):
     pk_url_kwarg = 'post_id'
 
     def dispatch(self, request, *args, **kwargs):
-        """Проверка авторства публикации"""
-        post = get_object_or_404(Post, pk=self.kwargs['post_id'])
-        if post.author != self.request.user:
+        """
+        Проверка авторства публикации; публикация загружается один раз
+        и переиспользуется в get_object
+        """
+        self.blog_post = get_object_or_404(Post, pk=self.kwargs['post_id'])
+        if self.blog_post.author_id != self.request.user.pk:
             return redirect(
                 'blog:post_detail',
                 post_id=self.kwargs['post_id']
             )
         return super().dispatch(request, *args, **kwargs)
 
+    def get_object(self, queryset=None):
+        """Публикация, загруженная при проверке авторства"""
+        return self.blog_post
+
 
 class PostUpdateView(PostMixin, UpdateView):
     """Представление для редактирования публикации"""
@@ -203,40 +386,44 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
         return reverse('blog:profile', args=[self.request.user.username])
 
 
-class ProfileListView(ListView):
+class ProfileListView(ScheduledPublishingMixin, AnonymousPageCacheMixin,
+                      FeedPaginationMixin, ListView):
     """Представление для отображения профиля пользователя и его публикаций"""
 
     template_name = 'blog/profile.html'
     model = Post
-
-    def get_object(self):
-        """Получение объекта пользователя по имени пользователя"""
-        return get_object_or_404(User, username=self.kwargs['username'])
+    paginate_by = PAGINATOR_PROFILE
+    replica_reads = True
 
     def get_queryset(self):
-        """Получение публикаций пользователя"""
-        profile = self.get_object()
-        filter_published = self.request.user != profile
+        """
+        Получение публикаций пользователя; пользователь загружается один раз
+        и сохраняется для контекста
+        """
+        users = User.objects.all()
+        is_owner = self.request.user.get_username() == self.kwargs['username']
+        if replica_reads_active() and is_owner:
+            # Владелец видит свой профиль без отставания реплики
+            users = users.using(DEFAULT_DB_ALIAS)
+        self.profile = get_object_or_404(
+            users, username=self.kwargs['username']
+        )
+        self.is_owner = self.request.user == self.profile
         return get_posts_with_comments(
-            profile.posts.all(),
-            filter_published=filter_published
+            self.profile.posts.all(), filter_published=not self.is_owner
         )
 
+    def get_count_name(self):
+        """Владелец видит и неопубликованные записи, поэтому число своё"""
+        viewer = 'owner' if self.is_owner else 'public'
+        return f'profile:{self.profile.pk}:{viewer}'
+
     def get_context_data(self, **kwargs):
         """Добавление данных профиля в контекст"""
-        profile = self.get_object()
-        context = super().get_context_data(**kwargs)
-        page_obj = get_page_obj(
-            self.request,
-            self.get_queryset(),
-            PAGINATOR_PROFILE
-        )
-        context.update(
-            profile=profile,
-            page_obj=page_obj,
-            object_list=page_obj
+        return dict(
+            **super().get_context_data(**kwargs),
+            profile=self.profile
         )
-        return context
 
 
 class CommentCreateView(LoginRequiredMixin, CreateView):
@@ -246,10 +433,6 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
     template_name = 'blog/comment.html'
     form_class = CommentForm
 
-    def get_context_data(self, **kwargs):
-        """Добавление формы в контекст"""
-        return dict(**super().get_context_data(**kwargs), form=CommentForm())
-
     def form_valid(self, form):
         """Назначение автором текущего пользователя и привязка к публикации"""
         form.instance.author = self.request.user
@@ -276,14 +459,21 @@ class CommentMixin(LoginRequiredMixin):
         return reverse('blog:post_detail', args=[self.kwargs['comment_id']])
 
     def dispatch(self, request, *args, **kwargs):
-        """Проверка авторства комментария"""
-        coment = get_object_or_404(Comment, id=self.kwargs['comment_id'])
-        if coment.author != self.request.user:
+        """
+        Проверка авторства комментария; комментарий загружается один раз
+        и переиспользуется в get_object
+        """
+        self.comment = get_object_or_404(Comment, id=self.kwargs['comment_id'])
+        if self.comment.author_id != self.request.user.pk:
             return redirect('blog:post_detail',
                             post_id=self.kwargs['comment_id']
                             )
         return super().dispatch(request, *args, **kwargs)
 
+    def get_object(self, queryset=None):
+        """Комментарий, загруженный при проверке авторства"""
+        return self.comment
+
 
 class CommentUpdateView(CommentMixin, UpdateView):
     """Представление для редактирования комментария"""
@@ -295,3 +485,28 @@ class CommentDeleteView(CommentMixin, DeleteView):
     """Представление для удаления комментария"""
 
     ...
+
+
+class ExportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    Потоковая выгрузка данных в NDJSON для сотрудников
+    Параметры: models (через запятую) и since (дата ISO 8601)
+    """
+
+    def test_func(self):
+        """Доступ только для сотрудников"""
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        """Выгрузка строк по мере чтения из базы"""
+        try:
+            models = parse_models(request.GET.get('models'))
+            since = request.GET.get('since')
+            since = parse_since(since) if since else None
+        except ExportError as error:
+            return HttpResponseBadRequest(str(error))
+        response = StreamingHttpResponse(
+            iter_ndjson(models, since), content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = 'attachment; filename="blog.jsonl"'
+        return response
@@ -0,0 +1,112 @@
+# Проекция видимых публикаций: флаг Post.is_visible
+# Публикация видна в лентах, если она опубликована, её категория
+# опубликована и наступила pub_date. Ленты фильтруют по одному
+# индексированному флагу вместо трёх условий с timezone.now()
+# Флаг пересчитывают Post.save, сигналы категорий, команда
+# publish_scheduled и первый запрос ленты после наступления даты
+# ближайшей отложенной публикации: её время хранится в кэше (при
+# промахе пересчитывается запросом), а показ публикации сбрасывает кэш
+# страниц и чисел публикаций
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import (
+    get_page_cache, invalidate_feed_counts, invalidate_page_cache
+)
+from .models import Post
+
+NEXT_PUBLICATION_KEY = 'blog:next-publication'
+
+
+def visible_condition(now=None):
+    """Условие видимости публикации для фильтрации по связанным полям"""
+    return Q(
+        is_published=True, category__is_published=True,
+        pub_date__lte=now or timezone.now()
+    )
+
+
+def invalidate_feeds():
+    """Сбрасывает кэш страниц и чисел публикаций после смены видимости"""
+    invalidate_page_cache()
+    invalidate_feed_counts()
+
+
+def sync_visibility(queryset=None, now=None):
+    """
+    Приводит is_visible публикаций queryset в соответствие с условием;
+    меняет только расходящиеся строки. Возвращает их число
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    condition = visible_condition(now)
+    changed = (
+        queryset.filter(condition, is_visible=False).update(is_visible=True)
+        + queryset.filter(is_visible=True).exclude(condition)
+        .update(is_visible=False)
+    )
+    if changed:
+        invalidate_feeds()
+    return changed
+
+
+def next_publication_time():
+    """Время ближайшей отложенной публикации (timestamp) или 0"""
+    pub_date = (
+        Post.objects.filter(
+            is_published=True, category__is_published=True, is_visible=False
+        )
+        .order_by('pub_date').values_list('pub_date', flat=True).first()
+    )
+    return pub_date.timestamp() if pub_date else 0
+
+
+def remember_next_publication():
+    """Пересчитывает и возвращает время ближайшей отложенной публикации"""
+    timestamp = next_publication_time()
+    get_page_cache().set(NEXT_PUBLICATION_KEY, timestamp, None)
+    return timestamp
+
+
+def schedule_publication(pub_date):
+    """Запоминает время отложенной публикации, если оно раньше известного"""
+    cache = get_page_cache()
+    known = cache.get(NEXT_PUBLICATION_KEY)
+    if known is None:
+        # Время неизвестно (кэш очищен): публикация уже сохранена и
+        # попадёт в пересчёт
+        remember_next_publication()
+        return
+    timestamp = pub_date.timestamp()
+    if not known or timestamp < known:
+        cache.set(NEXT_PUBLICATION_KEY, timestamp, None)
+
+
+def publish_scheduled(now=None):
+    """
+    Показывает публикации, дата которых наступила; возвращает их число
+    и запоминает время следующей отложенной публикации
+    """
+    published = (
+        Post.objects.filter(visible_condition(now), is_visible=False)
+        .update(is_visible=True)
+    )
+    if published:
+        invalidate_feeds()
+    remember_next_publication()
+    return published
+
+
+def publish_due():
+    """
+    Показывает наступившие отложенные публикации, если время ближайшей
+    из них прошло; обычно стоит одного обращения к кэшу. Если времени
+    в кэше нет (перезапуск процесса, вытеснение, другой процесс), оно
+    пересчитывается запросом
+    """
+    due = get_page_cache().get(NEXT_PUBLICATION_KEY)
+    if due is None:
+        due = remember_next_publication()
+    if due and due <= timezone.now().timestamp():
+        publish_scheduled()
@@ -0,0 +1,173 @@
+# Замер стоимости запроса
+# Считает SQL-запросы и их время через connection.execute_wrapper,
+# поэтому работает и при DEBUG=False, а также время рендеринга шаблона
+# и представления. Результат уходит в заголовок Server-Timing и в лог
+# blogicum.timing на уровне DEBUG; превышение бюджета из
+# REQUEST_TIMING_BUDGETS записывается предупреждением
+# ReplicaRoutingMiddleware направляет чтение страниц на реплики
+# (blogicum/routers.py) и после записи закрепляет клиента за основной базой
+
+import logging
+import time
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+from .routers import (
+    enable_replica_reads, get_replicas, reset_replica_reads
+)
+
+logger = logging.getLogger('blogicum.timing')
+
+BUDGET_METRICS = ('queries', 'db_ms', 'tpl_ms', 'view_ms', 'total_ms')
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def sticky_cookie_name():
+    return getattr(settings, 'DATABASE_REPLICA_STICKY_COOKIE', 'primary_db')
+
+
+class QueryCounter:
+    """Обёртка выполнения SQL: считает запросы и суммарное время"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - start
+            self.count += 1
+
+
+class RequestTimingMiddleware:
+    """Собирает метрики запроса и сравнивает их с бюджетом представления"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        request.render_started = request.render_finished = None
+        start = perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        total = perf_counter() - start
+
+        render = 0.0
+        if request.render_finished is not None:
+            render = request.render_finished - request.render_started
+        metrics = {
+            'queries': counter.count,
+            'db_ms': counter.duration * 1000,
+            'tpl_ms': render * 1000,
+            'view_ms': (total - render) * 1000,
+            'total_ms': total * 1000,
+        }
+        if getattr(settings, 'REQUEST_TIMING_HEADER', True):
+            response['Server-Timing'] = self.server_timing(metrics)
+        self.log(request, response, metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        """Время рендеринга отсчитывается до вызова response.render()"""
+        request.render_started = perf_counter()
+
+        def finish(rendered):
+            request.render_finished = perf_counter()
+
+        response.add_post_render_callback(finish)
+        return response
+
+    @staticmethod
+    def server_timing(metrics):
+        return (
+            f'db;dur={metrics["db_ms"]:.1f};desc="{metrics["queries"]} SQL", '
+            f'tpl;dur={metrics["tpl_ms"]:.1f}, '
+            f'view;dur={metrics["view_ms"]:.1f}, '
+            f'total;dur={metrics["total_ms"]:.1f}'
+        )
+
+    @staticmethod
+    def log(request, response, metrics):
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        budget = getattr(settings, 'REQUEST_TIMING_BUDGETS', {}).get(
+            view_name, {}
+        )
+        exceeded = [
+            metric for metric in BUDGET_METRICS
+            if metric in budget and metrics[metric] > budget[metric]
+        ]
+        if not exceeded and not logger.isEnabledFor(logging.DEBUG):
+            return
+
+        line = {
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            **{key: round(value, 2) for key, value in metrics.items()},
+        }
+        logger.debug(
+            ' '.join(f'{key}={value}' for key, value in line.items()),
+            extra={'timing': line}
+        )
+        if exceeded:
+            logger.warning(
+                'Превышен бюджет представления %s: %s', view_name,
+                ', '.join(
+                    f'{metric}={line[metric]} > {budget[metric]}'
+                    for metric in exceeded
+                ),
+                extra={'timing': line, 'exceeded': exceeded}
+            )
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Включает чтение с реплик для GET-запросов к представлениям
+    с replica_reads = True; после запроса на запись клиент получает cookie
+    и DATABASE_REPLICA_STICKY_SECONDS читает только основную базу
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.replica_token = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if request.replica_token is not None:
+                reset_replica_reads(request.replica_token)
+        if request.method not in SAFE_METHODS and get_replicas():
+            seconds = getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 10)
+            response.set_cookie(
+                sticky_cookie_name(), str(int(time.time() + seconds)),
+                max_age=seconds, httponly=True, samesite='Lax'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if (request.method in SAFE_METHODS
+                and getattr(view_class, 'replica_reads', False)
+                and not self.is_sticky(request)):
+            request.replica_token = enable_replica_reads()
+
+    @staticmethod
+    def is_sticky(request):
+        """Не истекло ли окно чтения с основной базы после записи"""
+        try:
+            until = int(request.COOKIES.get(sticky_cookie_name(), 0))
+        except ValueError:
+            return False
+        return until > time.time()
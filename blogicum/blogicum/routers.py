@@ -0,0 +1,63 @@
+# Маршрутизация чтения на реплики
+# ReplicaRoutingMiddleware включает чтение с реплик только на время
+# GET-запроса к представлению с атрибутом replica_reads = True; в остальное
+# время, при записи и в окне «липкости» после записи (cookie) все запросы
+# идут в основную базу default. Сессии всегда читаются с основной базы,
+# чтобы вход и выход из системы действовали сразу
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Приложения, модели которых всегда читаются с основной базы
+PRIMARY_ONLY_APPS = ('sessions',)
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def get_replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def replica_reads_active():
+    """Идёт ли чтение текущего запроса с реплики"""
+    return _replica_reads.get() and bool(get_replicas())
+
+
+def enable_replica_reads():
+    """Включает чтение с реплик; возвращает токен для reset_replica_reads"""
+    return _replica_reads.set(True)
+
+
+def reset_replica_reads(token):
+    _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Чтение со случайной реплики внутри разрешённых запросов,
+    запись — всегда в основную базу
+    """
+
+    def db_for_read(self, model, **hints):
+        if (not _replica_reads.get()
+                or model._meta.app_label in PRIMARY_ONLY_APPS):
+            return None
+        # Связанные объекты читаются из той же базы, что и исходный объект
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        replicas = get_replicas()
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
@@ -56,6 +56,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blogicum.middleware.RequestTimingMiddleware',
+    'blogicum.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -154,4 +156,72 @@ LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "blog:index"
 
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
-EMAIL_FILE_PATH = BASE_DIR / "sent_emails"
\ No newline at end of file
+EMAIL_FILE_PATH = BASE_DIR / "sent_emails"
+
+# Замер запросов: заголовок Server-Timing, лог blogicum.timing и бюджеты
+# представлений (queries, db_ms, tpl_ms, view_ms, total_ms)
+REQUEST_TIMING_HEADER = True
+REQUEST_TIMING_BUDGETS = {
+    'blog:index': {'queries': 6, 'total_ms': 300},
+    'blog:category_posts': {'queries': 7, 'total_ms': 300},
+    'blog:profile': {'queries': 7, 'total_ms': 300},
+    'blog:post_detail': {'queries': 6, 'total_ms': 300},
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # Строка на каждый запрос пишется на уровне DEBUG, превышение
+        # бюджета — WARNING; DEBUG включает замер всех запросов
+        'blogicum.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# Кэш: для нескольких процессов подойдёт FileBasedCache или Redis
+# (django.core.cache.backends.redis.RedisCache)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blogicum',
+    },
+}
+
+# Кэш страниц лент и публикаций для анонимных читателей; 0 отключает кэш
+BLOG_PAGE_CACHE_ALIAS = 'default'
+BLOG_PAGE_CACHE_TIMEOUT = 60
+# Карточки публикаций в лентах; ключ меняется при любой правке публикации,
+# 0 отключает кэш карточек
+BLOG_CARD_CACHE_TIMEOUT = 60 * 60
+# Число публикаций в лентах для пагинатора; короткий срок учитывает
+# отложенные публикации, 0 отключает кэш
+BLOG_FEED_COUNT_TIMEOUT = 30
+
+# Уменьшенные копии изображений строятся в фоновых потоках после
+# сохранения публикации; False строит их сразу после фиксации транзакции
+BLOG_IMAGE_VARIANTS_ASYNC = True
+BLOG_IMAGE_WORKERS = 2
+
+# Курсорная пагинация главной ленты по умолчанию (?page=N работает всегда)
+BLOG_FEED_CURSOR_PAGINATION = False
+
+# PRAGMA для каждого нового соединения SQLite (blogicum/sqlite.py);
+# рабочий профиль включает WAL в settings_production
+SQLITE_PRAGMAS = {}
+
+# Реплики только для чтения: псевдонимы из DATABASES. Ленты, страницы
+# публикаций и статические страницы читаются с них (blogicum/routers.py);
+# после записи клиент DATABASE_REPLICA_STICKY_SECONDS читает основную базу
+DATABASE_ROUTERS = ['blogicum.routers.ReplicaRouter']
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_STICKY_SECONDS = 10
+DATABASE_REPLICA_STICKY_COOKIE = 'primary_db'
+
+# Разбор всех шаблонов из DIRS при запуске WSGI-процесса (blogicum/warmup.py)
+TEMPLATE_WARMUP = False
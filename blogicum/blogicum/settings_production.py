@@ -0,0 +1,43 @@
+# Профиль настроек для рабочего сервера
+# DJANGO_SETTINGS_MODULE=blogicum.settings_production
+# SQLite работает в режиме WAL с ожиданием блокировок (blogicum/sqlite.py)
+# BLOGICUM_SQLITE_REPLICA — путь к копии базы, с которой читаются страницы
+# Шаблоны загружаются кэширующим загрузчиком и прогреваются при запуске
+# WSGI-процесса (blogicum/warmup.py)
+
+import os
+from copy import deepcopy
+
+from .settings import *  # noqa: F401, F403
+from .settings import DATABASES, TEMPLATES
+from .sqlite import TUNED_PRAGMAS
+
+# Копии, чтобы не менять словари профиля разработки
+DATABASES = deepcopy(DATABASES)
+TEMPLATES = deepcopy(TEMPLATES)
+
+DEBUG = False
+
+SQLITE_PRAGMAS = TUNED_PRAGMAS
+
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+TEMPLATE_WARMUP = True
+
+DATABASES['default']['OPTIONS'] = {
+    # Ожидание блокировки модулем sqlite3, в секундах
+    'timeout': TUNED_PRAGMAS['busy_timeout'] / 1000,
+}
+
+if os.environ.get('BLOGICUM_SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['BLOGICUM_SQLITE_REPLICA'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = ['replica']
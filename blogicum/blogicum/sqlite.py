@@ -0,0 +1,30 @@
+# Настройка соединений SQLite
+# При открытии каждого соединения выполняются PRAGMA из SQLITE_PRAGMAS.
+# Пустой словарь (по умолчанию) оставляет настройки SQLite без изменений;
+# профиль TUNED_PRAGMAS подключается в settings_production
+
+from django.conf import settings
+
+# WAL позволяет читателям работать параллельно с записью, а busy_timeout
+# заставляет писателя ждать освобождения блокировки вместо ошибки
+# «database is locked»
+TUNED_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """Обработчик connection_created: выполняет PRAGMA из настроек"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,38 @@
+# Прогрев шаблонов при запуске процесса
+# С кэширующим загрузчиком каждый шаблон разбирается один раз на процесс;
+# warm_templates разбирает все шаблоны из каталогов DIRS заранее, чтобы
+# первые запросы воркера не платили за чтение и разбор файлов
+
+import logging
+from pathlib import Path
+
+from django.template import TemplateSyntaxError, engines
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIXES = ('.html', '.txt')
+
+
+def template_names(directory):
+    """Имена шаблонов каталога относительно него, в стиле get_template"""
+    root = Path(directory)
+    return sorted(
+        path.relative_to(root).as_posix()
+        for path in root.rglob('*')
+        if path.is_file() and path.suffix in TEMPLATE_SUFFIXES
+    )
+
+
+def warm_templates():
+    """Загружает все шаблоны из DIRS во все движки; возвращает их число"""
+    loaded = 0
+    for engine in engines.all():
+        for directory in getattr(engine, 'dirs', ()):
+            for name in template_names(directory):
+                try:
+                    engine.get_template(name)
+                except TemplateSyntaxError:
+                    logger.exception('Не удалось разобрать шаблон %s', name)
+                    continue
+                loaded += 1
+    return loaded
@@ -1,4 +1,5 @@
 # Подключение шаблонов кастомных страниц для ошибок с помощью view-классов
+# Статические страницы читают данные (пользователя в шапке) с реплик
 
 from django.shortcuts import render
 from django.views.generic import TemplateView
@@ -8,12 +9,14 @@ class About(TemplateView):
     """view-класс для страницы about"""
 
     template_name = 'pages/about.html'
+    replica_reads = True
 
 
 class Rules(TemplateView):
     """view-класс для страницы rules"""
 
     template_name = 'pages/rules.html'
+    replica_reads = True
 
 
 # view-функции для ошибок 403csrf, 404, 500
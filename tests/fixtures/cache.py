@@ -0,0 +1,18 @@
+import pytest
+
+from blog.visibility import remember_next_publication
+
+
+@pytest.fixture
+def disable_page_cache(settings):
+    """Страницы отрисовываются на каждый запрос, без кэша страниц"""
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+
+
+@pytest.fixture
+def known_publication_schedule(db):
+    """
+    Время ближайшей отложенной публикации уже в кэше, как у работающего
+    сайта: бюджеты запросов не включают его пересчёт после очистки кэша
+    """
+    remember_next_publication()
@@ -0,0 +1,110 @@
+import re
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List
+
+import pytest
+from django.db import connections
+from django.test.client import Client
+
+NUMBERS = re.compile(r"\b\d+(\.\d+)?\b")
+STRINGS = re.compile(r"'[^']*'")
+
+
+def normalize_sql(sql: str) -> str:
+    return NUMBERS.sub("?", STRINGS.sub("?", sql))
+
+
+def format_queries(queries: List[str], budget: int) -> str:
+    """
+    Разница с бюджетом в виде diff: запросы сверх бюджета отмечены «+»,
+    повторы уже выполненного запроса — номером первого из них
+    """
+    lines = [
+        f"--- бюджет: {budget}",
+        f"+++ выполнено: {len(queries)} (+{len(queries) - budget})",
+    ]
+    first_seen: Dict[str, int] = {}
+    for number, sql in enumerate(queries, 1):
+        normalized = normalize_sql(sql)
+        first = first_seen.setdefault(normalized, number)
+        mark = "+" if number > budget else " "
+        repeat = f"  [повтор №{first}]" if first != number else ""
+        lines.append(f"{mark}{number:>3}. {sql}{repeat}")
+    repeated = [
+        (count, sql)
+        for sql, count in Counter(map(normalize_sql, queries)).items()
+        if count > 1
+    ]
+    if repeated:
+        lines.append("Повторяющиеся запросы (возможный N+1):")
+        lines.extend(f"  ×{count}: {sql}" for count, sql in repeated)
+    return "\n".join(lines)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def capture_queries():
+    queries: List[str] = []
+
+    def capture(execute, sql, params, many, context):
+        queries.append(f"{sql} -- {params!r}" if params else sql)
+        return execute(sql, params, many, context)
+
+    wrappers = [
+        connection.execute_wrapper(capture)
+        for connection in connections.all()
+    ]
+    for wrapper in wrappers:
+        wrapper.__enter__()
+    try:
+        yield queries
+    finally:
+        for wrapper in reversed(wrappers):
+            wrapper.__exit__(None, None, None)
+
+
+def check_budget(name: str, queries: List[str], budget: int):
+    if len(queries) > budget:
+        raise QueryBudgetExceeded(
+            f"Страница `{name}` выполнила {len(queries)} SQL-запросов при"
+            f" бюджете {budget}:\n{format_queries(queries, budget)}"
+        )
+
+
+@contextmanager
+def assert_query_budget(budget: int, name: str = "блок"):
+    with capture_queries() as queries:
+        yield queries
+    check_budget(name, queries, budget)
+
+
+@pytest.fixture
+def query_budget(request, monkeypatch):
+    """
+    Проверяет каждый запрос тестового клиента по бюджету маркера
+    query_budget; имя маршрута берётся из response.resolver_match.
+    Возвращает словарь «маршрут -> число запросов последнего обращения»
+    """
+    marker = request.node.get_closest_marker("query_budget")
+    budgets: Dict[str, int] = dict(marker.kwargs) if marker else {}
+    measured: Dict[str, int] = {}
+    original = Client.request
+
+    def budgeted_request(client, **kwargs):
+        with capture_queries() as queries:
+            response = original(client, **kwargs)
+        match = getattr(response, "resolver_match", None)
+        if match is not None:
+            measured[match.url_name] = len(queries)
+            if match.url_name in budgets:
+                check_budget(
+                    match.view_name, queries, budgets[match.url_name]
+                )
+        return response
+
+    monkeypatch.setattr(Client, "request", budgeted_request)
+    return measured
@@ -0,0 +1,81 @@
+from http import HTTPStatus
+
+import pytest
+
+from fixtures.queries import capture_queries
+
+
+def blend_rows(mixer, count):
+    locations = mixer.cycle(count).blend(
+        "blog.Location", name=mixer.sequence("Город {0}")
+    )
+    posts = mixer.cycle(count).blend(
+        "blog.Post", location=mixer.sequence(*locations),
+        category__is_published=True
+    )
+    mixer.cycle(count).blend("blog.Comment", post=mixer.sequence(*posts))
+    return posts
+
+
+def changelist(client, url):
+    with capture_queries() as queries:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return response.content.decode(), len(queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", ("/admin/blog/post/", "/admin/blog/comment/"))
+def test_changelist_does_not_grow_with_tables(mixer, admin_client, url):
+    blend_rows(mixer, 2)
+    _, small_queries = changelist(admin_client, url)
+    blend_rows(mixer, 20)
+    mixer.cycle(30).blend("blog.Location", name="Лишнее место")
+    html, large_queries = changelist(admin_client, url)
+    assert large_queries == small_queries, (
+        f"Убедитесь, что число SQL-запросов списка `{url}` не растёт с"
+        " числом строк: связанные объекты загружаются list_select_related,"
+        " а виджеты не запрашивают их по одному."
+    )
+    assert "Лишнее место" not in html, (
+        f"Убедитесь, что список `{url}` не выводит <select> со всеми"
+        " строками связанной таблицы."
+    )
+
+
+@pytest.mark.django_db
+def test_post_search_and_autocomplete_use_index(mixer, admin_client):
+    post, other = blend_rows(mixer, 2)
+    post.title = "Дракон над городом"
+    post.save()
+    response = admin_client.get("/admin/blog/post/", {"q": "дракон"})
+    assert list(response.context["cl"].result_list) == [post]
+
+    response = admin_client.get("/admin/autocomplete/", {
+        "app_label": "blog", "model_name": "comment",
+        "field_name": "post", "term": "Дракон",
+    })
+    assert response.status_code == HTTPStatus.OK
+    assert [item["id"] for item in response.json()["results"]] == [
+        str(post.pk)
+    ], "Убедитесь, что автодополнение публикаций ищет по индексу поиска."
+
+
+@pytest.mark.django_db
+def test_post_author_filter_is_bounded(mixer, admin_client):
+    post, other = blend_rows(mixer, 2)
+    mixer.cycle(5).blend("auth.User", username=mixer.sequence("лишний{0}"))
+    html, _ = changelist(admin_client, "/admin/blog/post/")
+    assert "лишний0" not in html, (
+        "Убедитесь, что фильтр публикаций по автору не выводит список всех"
+        " пользователей."
+    )
+    assert 'name="author"' in html, (
+        "Убедитесь, что список публикаций можно отфильтровать по автору."
+    )
+
+    response = admin_client.get(
+        "/admin/blog/post/", {"author": post.author.username}
+    )
+    assert list(response.context["cl"].result_list) == [post]
+    assert f'value="{post.author.username}"' in response.content.decode()
@@ -0,0 +1,122 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from fixtures.queries import capture_queries
+
+
+@pytest.fixture
+def visible_posts(mixer, user, published_category):
+    return mixer.cycle(12).blend(
+        "blog.Post", author=user, is_published=True,
+        category=published_category,
+        pub_date=mixer.sequence(
+            *(timezone.now() - timedelta(hours=hour) for hour in range(12))
+        ),
+    )
+
+
+@pytest.fixture
+def hidden_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, is_published=False,
+        category=published_category, pub_date=timezone.now(),
+    )
+
+
+def get_json(client, url, **params):
+    response = client.get(url, params)
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"] == "application/json"
+    return response, response.json()
+
+
+@pytest.mark.django_db
+def test_feed_cursor_pages(client, visible_posts, hidden_post):
+    _, data = get_json(client, "/api/posts/")
+    assert [item["id"] for item in data["results"]] == [
+        post.id for post in visible_posts[:10]
+    ], "Убедитесь, что API главной ленты повторяет её порядок и видимость."
+    assert data["results"][0]["comment_count"] == 0
+    assert data["previous"] is None
+    _, data = get_json(client, "/api/posts/", cursor=data["next"])
+    assert [item["id"] for item in data["results"]] == [
+        post.id for post in visible_posts[10:]
+    ]
+    assert data["next"] is None
+    response = client.get("/api/posts/", {"cursor": "мусор"})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert "detail" in response.json()
+
+
+@pytest.mark.django_db
+def test_conditional_get(client, mixer, visible_posts):
+    response, _ = get_json(client, "/api/posts/")
+    etag = response["ETag"]
+    assert etag.startswith('"'), "Убедитесь, что API отдаёт строгий ETag."
+    assert response["Last-Modified"]
+
+    with capture_queries() as queries:
+        response = client.get("/api/posts/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response["ETag"] == etag
+    assert not queries, (
+        "Убедитесь, что ответ 304 отдаётся из кэша без запросов к базе."
+    )
+    response = client.get(
+        "/api/posts/", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    mixer.blend("blog.Comment", post=visible_posts[0])
+    response, data = get_json(client, "/api/posts/")
+    assert response["ETag"] != etag, (
+        "Убедитесь, что ETag меняется вместе с данными ответа."
+    )
+    assert data["results"][0]["comment_count"] == 1
+    response = client.get("/api/posts/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_category_and_profile_feeds(
+    client, user_client, user, mixer, visible_posts, hidden_post
+):
+    category = visible_posts[0].category
+    _, data = get_json(client, f"/api/category/{category.slug}/")
+    assert len(data["results"]) == 10
+    hidden = mixer.blend("blog.Category", is_published=False)
+    response = client.get(f"/api/category/{hidden.slug}/")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+    url = f"/api/profile/{user.username}/"
+    _, public = get_json(client, url)
+    assert hidden_post.id not in [item["id"] for item in public["results"]]
+    _, own = get_json(user_client, url)
+    assert own["results"][0] == {
+        **own["results"][0], "id": hidden_post.id, "is_visible": False
+    }, "Убедитесь, что владелец видит в API профиля свои скрытые публикации."
+
+
+@pytest.mark.django_db
+def test_post_detail_and_comments(
+    client, user_client, mixer, visible_posts, hidden_post
+):
+    post = visible_posts[0]
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    _, data = get_json(client, f"/api/posts/{post.id}/")
+    assert data["post"]["id"] == post.id
+    assert data["post"]["comment_count"] == 3
+    assert [item["id"] for item in data["comments"]["results"]] == [
+        comment.id for comment in comments
+    ]
+    _, data = get_json(client, f"/api/posts/{post.id}/comments/")
+    assert len(data["results"]) == 3
+
+    url = f"/api/posts/{hidden_post.id}/"
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что API не показывает скрытые публикации."
+    )
+    assert user_client.get(url).status_code == HTTPStatus.OK
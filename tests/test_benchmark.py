@@ -0,0 +1,43 @@
+import pytest
+
+from benchmarks.harness import (
+    Dataset, collect_targets, compare, percentile, run_target, seed_dataset
+)
+
+
+def test_percentile():
+    samples = list(range(1, 101))
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 95) == 95
+    assert percentile(samples, 99) == 99
+    assert percentile([7], 99) == 7
+
+
+def test_compare_flags_regressions():
+    baseline = {"a": {"p95_ms": 10, "rps": 100, "queries": 3}}
+    assert not compare(
+        {"a": {"p95_ms": 11, "rps": 95, "queries": 3}}, baseline
+    )
+    regressions = compare(
+        {"a": {"p95_ms": 20, "rps": 50, "queries": 4}}, baseline
+    )
+    assert len(regressions) == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_seed_and_run_every_route(settings):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+    author = seed_dataset(
+        Dataset(users=3, categories=2, locations=2, posts=40, comments=60)
+    )
+    targets = {target.name: target for target in collect_targets(author)}
+    for name in ("blog:index", "blog:post_detail (anonymous)",
+                 "blog:edit_comment", "pages:about"):
+        assert name in targets
+    result = run_target(
+        targets["blog:index (anonymous)"], author, requests=4,
+        concurrency=1, warmup=0
+    )
+    assert result.requests == 4
+    assert result.statuses == {"200": 4}
+    assert result.queries > 0
@@ -0,0 +1,127 @@
+import json
+from collections import Counter
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import transaction
+
+from blog.bulk_load import iter_records
+from fixtures.queries import capture_queries
+
+DB_JSON = Path(__file__).resolve().parent.parent / "db.json"
+
+
+def _snapshot(labels):
+    return {
+        label: list(apps.get_model(label).objects.order_by("pk").values())
+        for label in labels
+    }
+
+
+def test_iter_records_reads_array_and_ndjson_in_small_chunks():
+    text = DB_JSON.read_text(encoding="utf-8")
+    expected = json.loads(text)
+    assert list(iter_records(StringIO(text), read_size=7)) == expected, (
+        "Убедитесь, что разбор фикстуры по частям совпадает с json.loads."
+    )
+    ndjson = "\n".join(json.dumps(record) for record in expected[:5])
+    assert list(iter_records(StringIO(ndjson), read_size=3)) == expected[:5]
+
+
+def _load_both_ways(path, labels):
+    with transaction.atomic():
+        call_command("loaddata", str(path), verbosity=0)
+        expected = _snapshot(labels)
+        transaction.set_rollback(True)
+    stdout = StringIO()
+    call_command("bulk_loaddata", str(path), batch_size=10, stdout=stdout)
+    assert _snapshot(labels) == expected, (
+        "Убедитесь, что bulk_loaddata приводит базу в то же состояние,"
+        " что и loaddata."
+    )
+    return stdout.getvalue()
+
+
+@pytest.mark.django_db
+def test_bulk_loaddata_matches_loaddata():
+    labels = Counter(
+        record["model"] for record in json.loads(DB_JSON.read_text("utf-8"))
+    )
+    output = _load_both_ways(DB_JSON, labels)
+    assert f"Загружено объектов: {sum(labels.values())}" in output
+    assert "строк/с" in output
+
+
+@pytest.mark.django_db
+def test_bulk_loaddata_reads_export(tmp_path, comment_to_a_post):
+    # Выгрузка export_ndjson перезаписывает существующие строки
+    path = tmp_path / "blog.jsonl"
+    call_command("export_ndjson", output=str(path))
+    _load_both_ways(path, ["blog.post", "blog.comment", "blog.category"])
+
+
+@pytest.mark.django_db
+def test_loaders_recount_comments(tmp_path, comment_to_a_post):
+    post = comment_to_a_post.post
+    path = tmp_path / "blog.jsonl"
+    call_command("export_ndjson", output=str(path))
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    for record in records:
+        # Выгрузка до появления счётчика
+        record["fields"].pop("comment_count", None)
+    path.write_text("\n".join(map(json.dumps, records)))
+    comment_to_a_post.delete()
+    apps.get_model("blog.Post").objects.filter(pk=post.pk).delete()
+
+    _load_both_ways(path, ["blog.post", "blog.comment"])
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что после загрузки фикстуры счётчик комментариев"
+        " публикации равен числу её комментариев."
+    )
+
+    # Новые комментарии старой публикации, как в export_ndjson --since
+    comments = [
+        record for record in records if record["model"] == "blog.comment"
+    ]
+    extra = dict(comments[0], pk=comments[0]["pk"] + 100)
+    path.write_text(json.dumps(extra))
+    _load_both_ways(path, ["blog.post", "blog.comment"])
+    post.refresh_from_db()
+    assert post.comment_count == 2
+
+
+@pytest.mark.django_db
+def test_full_batches_follow_load_order(
+    tmp_path, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(5).blend("blog.Comment", post=post)
+    path = tmp_path / "blog.jsonl"
+    call_command("export_ndjson", output=str(path))
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    comments = [item for item in records if item["model"] == "blog.comment"]
+    others = [item for item in records if item["model"] != "blog.comment"]
+
+    # Публикация прочитана раньше заполненной пачки комментариев
+    path.write_text("\n".join(map(json.dumps, others + comments)))
+    with capture_queries() as queries:
+        call_command(
+            "bulk_loaddata", str(path), batch_size=2, stdout=StringIO()
+        )
+    inserts = [
+        sql for sql in queries
+        if sql.startswith("INSERT") and ("blog_post" in sql
+                                         or "blog_comment" in sql)
+    ]
+    assert '"blog_post"' in inserts[0], (
+        "Убедитесь, что заполненная пачка комментариев вставляется после"
+        " уже прочитанных публикаций."
+    )
+
+    # Больше batch_size комментариев до их публикации в файле
+    path.write_text("\n".join(map(json.dumps, comments + others)))
+    _load_both_ways(path, ["blog.post", "blog.comment"])
@@ -0,0 +1,178 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.contrib.admin.models import CHANGE, DELETION, LogEntry
+from django.utils import timezone
+
+from blog import moderation
+from blog.models import Category, Comment, Location, Post
+from fixtures.queries import capture_queries
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    monkeypatch.setattr(moderation, "BATCH_SIZE", 2)
+
+
+def blend_posts(mixer, count, category):
+    return mixer.cycle(count).blend(
+        "blog.Post", is_published=True, category=category,
+        pub_date=timezone.now() - timedelta(days=1)
+    )
+
+
+def run_action(client, model, action, objects=None, **data):
+    data.update(action=action, index=0)
+    if objects is None:
+        # «Выбрать все» на странице списка: отмечены строки страницы
+        data["select_across"] = 1
+        objects = client.get(f"/admin/blog/{model}/").context["cl"].result_list
+    data["_selected_action"] = [obj.pk for obj in objects]
+    return client.post(f"/admin/blog/{model}/", data)
+
+
+@pytest.mark.django_db
+def test_posts_unpublish_and_publish_in_batches(
+    mixer, admin_client, small_batches, published_category
+):
+    posts = blend_posts(mixer, 5, published_category)
+    assert all(post.is_visible for post in posts)
+
+    response = run_action(admin_client, "post", "unpublish_selected")
+    assert response.status_code == HTTPStatus.FOUND
+    assert not Post.objects.filter(is_published=True).exists()
+    assert not Post.objects.filter(is_visible=True).exists(), (
+        "Убедитесь, что снятие с публикации скрывает публикации из лент."
+    )
+    entries = LogEntry.objects.filter(action_flag=CHANGE)
+    assert entries.count() == 3, (
+        "Убедитесь, что действие записывает в журнал одну запись на порцию,"
+        " а не на каждую строку."
+    )
+    assert "Снято с публикации: 2" in entries.order_by("pk")[0].change_message
+
+    run_action(admin_client, "post", "publish_selected", posts[:2])
+    assert set(Post.objects.filter(is_visible=True)) == set(posts[:2])
+
+
+@pytest.mark.django_db
+def test_action_queries_do_not_grow_with_rows(
+    mixer, admin_client, published_category
+):
+    blend_posts(mixer, 2, published_category)
+    with capture_queries() as small:
+        run_action(admin_client, "post", "unpublish_selected")
+    blend_posts(mixer, 10, published_category)
+    with capture_queries() as large:
+        run_action(admin_client, "post", "unpublish_selected")
+    assert len(large) == len(small), (
+        "Убедитесь, что действие меняет строки одним UPDATE на порцию,"
+        " без запросов на каждую строку."
+    )
+
+
+@pytest.mark.django_db
+def test_move_posts_to_category(mixer, admin_client, published_category):
+    unpublished_category = mixer.blend("blog.Category", is_published=False)
+    posts = blend_posts(mixer, 3, published_category)
+    run_action(
+        admin_client, "post", "move_to_category", posts[:2],
+        category=unpublished_category.pk
+    )
+    assert set(unpublished_category.posts.all()) == set(posts[:2])
+    assert list(Post.objects.filter(is_visible=True)) == [posts[2]]
+
+    response = run_action(admin_client, "post", "move_to_category", posts)
+    assert response.status_code == HTTPStatus.FOUND
+    assert published_category.posts.count() == 1, (
+        "Убедитесь, что без выбранной категории публикации не переносятся."
+    )
+
+    mixer.cycle(3).blend("blog.Category", title="Лишняя категория")
+    html = admin_client.get("/admin/blog/post/").content.decode()
+    select = html[html.index('<select name="category"'):]
+    assert "Лишняя категория" not in select[:select.index("</select>")], (
+        "Убедитесь, что категория переноса выбирается автодополнением,"
+        " а не из списка всех категорий."
+    )
+
+
+@pytest.mark.django_db
+def test_delete_posts_with_comments(
+    mixer, admin_client, small_batches, published_category
+):
+    posts = blend_posts(mixer, 3, published_category)
+    mixer.cycle(4).blend("blog.Comment", post=posts[0], text="Дракон")
+    kept = mixer.blend("blog.Comment", post=posts[2])
+
+    response = run_action(admin_client, "post", "delete_in_batches", posts[:2])
+    assert response.status_code == HTTPStatus.OK
+    assert Post.objects.count() == 3, (
+        "Убедитесь, что удаление требует подтверждения."
+    )
+    assert "Будут удалены" in response.content.decode()
+
+    run_action(
+        admin_client, "post", "delete_in_batches", posts[:2], post="yes"
+    )
+    assert list(Post.objects.all()) == [posts[2]]
+    assert list(Comment.objects.all()) == [kept]
+    assert LogEntry.objects.filter(action_flag=DELETION).count() == 1
+    response = admin_client.get("/admin/blog/comment/", {"q": "дракон"})
+    assert list(response.context["cl"].result_list) == []
+
+
+@pytest.mark.django_db
+def test_delete_comments_updates_counts(
+    mixer, admin_client, small_batches, published_category
+):
+    post, other = blend_posts(mixer, 2, published_category)
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    mixer.blend("blog.Comment", post=other)
+    run_action(
+        admin_client, "comment", "delete_in_batches", comments, post="yes"
+    )
+    post.refresh_from_db()
+    other.refresh_from_db()
+    assert (post.comment_count, other.comment_count) == (0, 1), (
+        "Убедитесь, что удаление комментариев уменьшает счётчики их"
+        " публикаций."
+    )
+    assert Comment.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_category_and_location_actions(
+    mixer, client, settings, admin_client, published_category,
+    published_location
+):
+    posts = blend_posts(mixer, 2, published_category)
+    Post.objects.update(location=published_location)
+    assert len(client.get("/").context["page_obj"]) == 2
+
+    run_action(admin_client, "category", "unpublish_selected")
+    assert not Post.objects.filter(is_visible=True).exists()
+    assert len(client.get("/").context["page_obj"]) == 0, (
+        "Убедитесь, что действие сбрасывает кэш страниц лент."
+    )
+    run_action(admin_client, "category", "publish_selected")
+    assert Post.objects.filter(is_visible=True).count() == 2
+
+    run_action(admin_client, "location", "delete_in_batches", post="yes")
+    assert not Location.objects.exists()
+    assert not Post.objects.exclude(location=None).exists()
+
+    run_action(admin_client, "category", "delete_in_batches", post="yes")
+    assert not Category.objects.exists()
+    assert Post.objects.filter(category=None).count() == len(posts)
+    assert not Post.objects.filter(is_visible=True).exists()
+
+
+def test_batch_deletes_handle_every_relation():
+    for model in moderation.HANDLED_RELATIONS:
+        assert moderation.unhandled_relations(model) == [], (
+            "Убедитесь, что удаление порциями (blog/moderation.py)"
+            f" обрабатывает все внешние ключи на {model._meta.label}."
+        )
+    assert set(moderation.DELETERS) <= set(moderation.HANDLED_RELATIONS)
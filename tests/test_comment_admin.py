@@ -0,0 +1,94 @@
+from datetime import datetime
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from blog.models import Comment
+from fixtures.queries import capture_queries
+
+
+@pytest.fixture
+def comments(mixer):
+    alice = mixer.blend("auth.User", username="alice")
+    alicia = mixer.blend("auth.User", username="alicia")
+    bob = mixer.blend("auth.User", username="bob")
+    post = mixer.blend("blog.Post", category__is_published=True)
+    return {
+        "alice": mixer.blend(
+            "blog.Comment", author=alice, post=post, text="Первый отзыв"
+        ),
+        "alicia": mixer.blend(
+            "blog.Comment", author=alicia, post=post, text="Второй отзыв"
+        ),
+        "bob": mixer.blend(
+            "blog.Comment", author=bob, post=post, text="Отличный дракон"
+        ),
+    }
+
+
+def found(client, **params):
+    response = client.get("/admin/blog/comment/", params)
+    assert response.status_code == HTTPStatus.OK
+    return {comment.pk for comment in response.context["cl"].result_list}
+
+
+@pytest.mark.django_db
+def test_comment_search_by_author_and_text(admin_client, comments):
+    alice, alicia, bob = (
+        comments["alice"].pk, comments["alicia"].pk, comments["bob"].pk
+    )
+    assert found(admin_client, q="alicia") == {alicia}
+    assert found(admin_client, q="ali") == {alice, alicia}, (
+        "Убедитесь, что комментарии находятся по началу имени автора."
+    )
+    assert found(admin_client, q="дракон") == {bob}, (
+        "Убедитесь, что комментарии находятся по словам текста."
+    )
+    assert found(admin_client, q="отзыв второй") == {alicia}
+
+    comment = Comment.objects.get(pk=bob)
+    comment.text = "Без чудовищ"
+    comment.save()
+    assert found(admin_client, q="дракон") == set(), (
+        "Убедитесь, что изменение текста комментария обновляет индекс."
+    )
+    comment.delete()
+    assert found(admin_client, q="чудовищ") == set()
+
+
+@pytest.mark.django_db
+def test_comment_date_hierarchy_probes_index(admin_client, comments):
+    tz = timezone.get_current_timezone()
+    Comment.objects.filter(pk=comments["alice"].pk).update(
+        created_at=datetime(2021, 3, 5, tzinfo=tz)
+    )
+    Comment.objects.filter(pk=comments["alicia"].pk).update(
+        created_at=datetime(2023, 7, 1, tzinfo=tz)
+    )
+    Comment.objects.filter(pk=comments["bob"].pk).update(
+        created_at=datetime(2023, 11, 30, tzinfo=tz)
+    )
+    with capture_queries() as queries:
+        response = admin_client.get("/admin/blog/comment/")
+    html = response.content.decode()
+    assert "created_at__year=2021" in html
+    assert "created_at__year=2023" in html
+    assert "created_at__year=2022" not in html, (
+        "Убедитесь, что навигация по датам показывает только годы"
+        " с комментариями."
+    )
+    assert not any(
+        "django_datetime_trunc" in query for query in queries
+    ), (
+        "Убедитесь, что годы для навигации по датам находятся по индексу"
+        " created_at, а не усечением дат всех комментариев."
+    )
+
+    response = admin_client.get(
+        "/admin/blog/comment/", {"created_at__year": 2023}
+    )
+    html = response.content.decode()
+    assert "created_at__month=7" in html
+    assert "created_at__month=11" in html
+    assert "created_at__month=8" not in html
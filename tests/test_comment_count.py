@@ -0,0 +1,67 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+
+
+def _stored_count(post):
+    return Post.objects.values_list("comment_count", flat=True).get(
+        pk=post.pk
+    )
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comment_writes(
+    mixer, user, another_user, post_with_published_location, post_of_another_author
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend(Comment, post=post, author=another_user)
+    assert _stored_count(post) == 3, (
+        "Убедитесь, что создание комментария увеличивает Post.comment_count."
+    )
+
+    comments[0].delete()
+    assert _stored_count(post) == 2, (
+        "Убедитесь, что удаление комментария уменьшает Post.comment_count."
+    )
+
+    comments[1].post = post_of_another_author
+    comments[1].save()
+    assert _stored_count(post) == 1
+    assert _stored_count(post_of_another_author) == 1
+
+    another_user.delete()
+    assert _stored_count(post) == 0, (
+        "Убедитесь, что каскадное удаление комментариев уменьшает"
+        " Post.comment_count."
+    )
+
+
+@pytest.mark.django_db
+def test_post_save_keeps_comment_count(mixer, post_with_published_location):
+    post = post_with_published_location
+    stale = Post.objects.get(pk=post.pk)
+    mixer.blend(Comment, post=post)
+    stale.title = "Новый заголовок"
+    stale.save()
+    assert _stored_count(post) == 1, (
+        "Убедитесь, что сохранение публикации не перезаписывает счётчик"
+        " комментариев устаревшим значением."
+    )
+
+
+@pytest.mark.django_db
+def test_recount_comments_fixes_drift(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend(Comment, post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=7)
+
+    out = StringIO()
+    call_command("recount_comments", "--dry-run", stdout=out)
+    assert "Расхождений: 1" in out.getvalue()
+    assert _stored_count(post) == 7
+
+    call_command("recount_comments", stdout=StringIO())
+    assert _stored_count(post) == 2
@@ -0,0 +1,68 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.views import PAGINATOR_COMMENTS
+
+MORE_LINK = re.compile(r'href="([^"]+)" data-comments-more')
+COMMENT_ANCHOR = re.compile(r'name="comment_(\d+)"')
+
+
+@pytest.fixture
+def many_comments(mixer, post_with_published_location):
+    return mixer.cycle(PAGINATOR_COMMENTS * 2 + 5).blend(
+        "blog.Comment", post=post_with_published_location
+    )
+
+
+@pytest.mark.django_db
+def test_comments_are_paginated(
+    client, post_with_published_location, many_comments
+):
+    post = post_with_published_location
+    with CaptureQueriesContext(connection) as queries:
+        content = client.get(f"/posts/{post.id}/").content.decode()
+    assert not any(
+        "COUNT(" in query["sql"] and "blog_comment" in query["sql"]
+        for query in queries
+    ), "Число комментариев должно браться из Post.comment_count."
+    assert f"Комментарии ({len(many_comments)})" in content
+
+    seen = [int(pk) for pk in COMMENT_ANCHOR.findall(content)]
+    assert len(seen) == PAGINATOR_COMMENTS, (
+        "Убедитесь, что на странице публикации выводится только первая"
+        " страница комментариев."
+    )
+    more = MORE_LINK.search(content)
+    while more:
+        fragment = client.get(more.group(1).replace("&amp;", "&"))
+        assert fragment.status_code == HTTPStatus.OK
+        fragment_content = fragment.content.decode()
+        assert "<html" not in fragment_content
+        seen.extend(int(pk) for pk in COMMENT_ANCHOR.findall(fragment_content))
+        more = MORE_LINK.search(fragment_content)
+
+    expected = sorted(many_comments, key=lambda c: (c.created_at, c.pk))
+    assert seen == [comment.pk for comment in expected]
+
+
+@pytest.mark.django_db
+def test_comment_fragment_respects_visibility(
+    client, user_client, mixer, user, published_category
+):
+    hidden = mixer.blend(
+        "blog.Post", author=user, is_published=False,
+        category=published_category
+    )
+    assert client.get(f"/posts/{hidden.id}/comments/").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+    assert user_client.get(f"/posts/{hidden.id}/comments/").status_code == (
+        HTTPStatus.OK
+    )
+    assert client.get(
+        f"/posts/{hidden.id}/comments/?cursor=bad"
+    ).status_code == HTTPStatus.NOT_FOUND
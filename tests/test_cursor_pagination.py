@@ -0,0 +1,76 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+
+pytestmark = pytest.mark.usefixtures("disable_page_cache")
+
+
+@pytest.fixture
+def feed_posts(mixer, user, published_category, published_location):
+    now = timezone.now()
+    # Половина постов с одинаковой датой: курсор должен различать их по id
+    dates = [now - timedelta(hours=i // 2) for i in range(N_PER_PAGE * 2 + 5)]
+    return mixer.cycle(len(dates)).blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        category=published_category,
+        location=published_location,
+        pub_date=mixer.sequence(*dates),
+    )
+
+
+def _walk(client, url, cursor_key):
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    page = response.context["page_obj"]
+    return [post.id for post in page], getattr(page, cursor_key)
+
+
+@pytest.mark.django_db
+def test_cursor_pages_match_offset_pages(client, feed_posts):
+    offset_ids = []
+    page = 1
+    while True:
+        response = client.get(f"/?page={page}")
+        page_obj = response.context["page_obj"]
+        offset_ids.extend(post.id for post in page_obj)
+        if not page_obj.has_next():
+            break
+        page += 1
+
+    cursor_ids = []
+    pages = []
+    ids, cursor = _walk(client, "/?cursor=", "next_cursor")
+    cursor_ids.extend(ids)
+    pages.append(ids)
+    while cursor:
+        ids, cursor = _walk(client, f"/?cursor={cursor}", "next_cursor")
+        cursor_ids.extend(ids)
+        pages.append(ids)
+    assert cursor_ids == offset_ids, (
+        "Убедитесь, что курсорная пагинация выдаёт те же публикации и в том"
+        " же порядке, что и пагинация по номеру страницы."
+    )
+
+    response = client.get("/?cursor=")
+    assert not response.context["page_obj"].has_previous()
+    second = client.get(
+        f"/?cursor={response.context['page_obj'].next_cursor}"
+    ).context["page_obj"]
+    back = client.get(f"/?cursor={second.previous_cursor}")
+    assert [post.id for post in back.context["page_obj"]] == pages[0], (
+        "Убедитесь, что ссылка на предыдущую страницу курсорной пагинации"
+        " возвращает на ту же страницу."
+    )
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_is_404(client, feed_posts):
+    response = client.get("/?cursor=not-a-cursor")
+    assert response.status_code == HTTPStatus.NOT_FOUND
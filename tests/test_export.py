@@ -0,0 +1,84 @@
+import json
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+
+def _records(lines):
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+@pytest.fixture
+def staff_client(client, user):
+    user.is_staff = True
+    user.save()
+    client.force_login(user)
+    return client
+
+
+@pytest.mark.django_db
+def test_export_streams_all_models(staff_client, comment_to_a_post):
+    response = staff_client.get("/export/")
+    assert response.status_code == HTTPStatus.OK
+    assert response.streaming, (
+        "Убедитесь, что выгрузка отдаётся потоковым ответом."
+    )
+    assert response["Content-Type"] == "application/x-ndjson"
+    records = _records(
+        b"".join(response.streaming_content).decode().splitlines()
+    )
+    assert [record["model"] for record in records] == [
+        "blog.category", "blog.location", "blog.post", "blog.comment"
+    ], (
+        "Убедитесь, что выгрузка содержит категории, местоположения,"
+        " публикации и комментарии в порядке зависимостей."
+    )
+    assert records[-1]["pk"] == comment_to_a_post.pk
+    assert records[-1]["fields"]["text"] == comment_to_a_post.text
+
+
+@pytest.mark.django_db
+def test_export_requires_staff(user_client, unlogged_client):
+    assert user_client.get("/export/").status_code == HTTPStatus.FORBIDDEN
+    assert unlogged_client.get("/export/").status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.django_db
+def test_export_since_and_bad_params(
+    staff_client, post_with_published_location
+):
+    since = (timezone.now() + timedelta(days=1)).isoformat()
+    response = staff_client.get("/export/", {"since": since})
+    assert b"".join(response.streaming_content) == b"", (
+        "Убедитесь, что параметр since отбирает только новые строки."
+    )
+    assert staff_client.get(
+        "/export/", {"since": "вчера"}
+    ).status_code == HTTPStatus.BAD_REQUEST
+    assert staff_client.get(
+        "/export/", {"models": "user"}
+    ).status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_export_command(tmp_path, post_with_published_location):
+    output = tmp_path / "blog.jsonl"
+    call_command("export_ndjson", models="post", output=str(output),
+                 chunk_size=1)
+    records = _records(output.read_text(encoding="utf-8").splitlines())
+    assert [record["pk"] for record in records] == [
+        post_with_published_location.pk
+    ]
+    # Публикация, дата которой позже since, попадает в выгрузку
+    post_with_published_location.pub_date = timezone.now() + timedelta(days=2)
+    post_with_published_location.save()
+    call_command(
+        "export_ndjson", models="post", output=str(output),
+        since=(timezone.now() + timedelta(days=1)).date().isoformat()
+    )
+    assert len(_records(output.read_text().splitlines())) == 1
+    with pytest.raises(CommandError):
+        call_command("export_ndjson", since="не дата")
@@ -0,0 +1,70 @@
+import pytest
+
+from fixtures.queries import capture_queries
+
+COUNT = "COUNT(*)"
+
+
+@pytest.fixture(autouse=True)
+def enable_count_cache(settings):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+    settings.BLOG_FEED_COUNT_TIMEOUT = 30
+
+
+def count_queries(client, url):
+    with capture_queries() as queries:
+        response = client.get(url)
+    return response, sum(COUNT in sql for sql in queries)
+
+
+@pytest.mark.django_db
+def test_feeds_count_once(
+    user, user_client, unlogged_client, many_posts_with_published_locations
+):
+    category = many_posts_with_published_locations[0].category
+    for url in ("/", f"/category/{category.slug}/",
+                f"/profile/{user.username}/"):
+        response, counts = count_queries(unlogged_client, url)
+        assert counts == 1
+        assert response.context["paginator"].count == 20
+        response, counts = count_queries(unlogged_client, url + "?page=2")
+        assert counts == 0, (
+            f"Убедитесь, что число публикаций ленты `{url}` берётся из кэша."
+        )
+        assert len(response.context["page_obj"]) == 10
+
+    _, counts = count_queries(user_client, f"/profile/{user.username}/")
+    assert counts == 1, (
+        "Убедитесь, что владелец профиля и другие читатели используют"
+        " разные записи кэша."
+    )
+
+
+@pytest.mark.django_db
+def test_counts_follow_post_changes(
+    mixer, user, unlogged_client, many_posts_with_published_locations
+):
+    unlogged_client.get("/")
+    mixer.blend("blog.Comment", post=many_posts_with_published_locations[0])
+    _, counts = count_queries(unlogged_client, "/")
+    assert counts == 0, (
+        "Убедитесь, что комментарии не сбрасывают кэш числа публикаций."
+    )
+
+    post = many_posts_with_published_locations[0]
+    post.is_published = False
+    post.save()
+    response = unlogged_client.get("/")
+    assert response.context["paginator"].count == 19, (
+        "Убедитесь, что снятие публикации сбрасывает кэш числа публикаций."
+    )
+    many_posts_with_published_locations[1].delete()
+    response = unlogged_client.get("/")
+    assert response.context["paginator"].count == 18
+
+    post.category.is_published = False
+    post.category.save()
+    response = unlogged_client.get("/")
+    assert response.context["paginator"].count == 0
+    response = unlogged_client.get(f"/profile/{user.username}/")
+    assert response.context["paginator"].count == 0
@@ -0,0 +1,66 @@
+import re
+from contextlib import contextmanager
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+
+# Частичные индексы post_visible_* содержат только видимые публикации,
+# поэтому их полный обход равен выборке ленты (COUNT(*) по ленте);
+# post_scheduled_idx — только скрытые опубликованные, обход по pub_date
+# останавливается на первой строке
+FULL_SCAN = re.compile(
+    r"\bSCAN (TABLE )?\"?blog_(post|comment)\b"
+    r"(?! USING (COVERING )?INDEX post_(visible_|scheduled_idx))"
+)
+FEED_TABLES = re.compile(r"\bblog_(post|comment)\b")
+
+
+@contextmanager
+def captured_selects():
+    queries = []
+
+    def capture(execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith("SELECT") and FEED_TABLES.search(
+            sql
+        ):
+            queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capture):
+        yield queries
+
+
+def query_plan(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+
+@pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="Проверяется план запросов SQLite"
+)
+@pytest.mark.django_db
+def test_feed_queries_use_indexes(
+    user, user_client, client, post_with_published_location,
+    comment_to_a_post
+):
+    post = post_with_published_location
+    urls = (
+        (client, "/"),
+        (client, f"/category/{post.category.slug}/"),
+        (client, f"/profile/{user.username}/"),
+        (user_client, f"/profile/{user.username}/"),
+        (client, f"/posts/{post.id}/"),
+    )
+    for page_client, url in urls:
+        with captured_selects() as queries:
+            response = page_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert queries
+        for sql, params in queries:
+            plan = query_plan(sql, params)
+            assert not FULL_SCAN.search(plan), (
+                f"Запрос страницы `{url}` читает таблицу целиком,"
+                f" а не по индексу:\n{sql}\n\n{plan}"
+            )
@@ -0,0 +1,40 @@
+import pytest
+from django.template.loader import render_to_string
+
+from blog.models import Post
+from blog.pagination import FeedPaginator
+
+
+def test_paginator_renders_bounded_window():
+    page = FeedPaginator(range(100_000), 10).page(5_000)
+    html = render_to_string("includes/paginator.html", {"page_obj": page})
+    assert html.count("<li") <= 13, (
+        "Убедитесь, что пагинатор выводит ограниченное окно страниц,"
+        " а не ссылку на каждую страницу."
+    )
+    for number in (1, 4_998, 4_999, 5_001, 5_002, 10_000):
+        assert f'href="?page={number}"' in html
+    assert 'href="?page=4997"' not in html
+    assert "…" in html
+
+
+@pytest.mark.django_db
+def test_precomputed_count_skips_count_query(django_assert_num_queries):
+    paginator = FeedPaginator(Post.objects.all(), 10, count=95)
+    with django_assert_num_queries(0):
+        assert paginator.num_pages == 10
+        assert list(paginator.get_elided_page_range(10))[-1] == 10
+
+
+@pytest.mark.django_db
+def test_feeds_use_feed_paginator(
+    user_client, user, many_posts_with_published_locations
+):
+    category = many_posts_with_published_locations[0].category
+    for url in ("/", f"/category/{category.slug}/",
+                f"/profile/{user.username}/"):
+        response = user_client.get(url)
+        assert isinstance(response.context["paginator"], FeedPaginator), (
+            f"Убедитесь, что лента `{url}` использует FeedPaginator."
+        )
+    assert 'href="?page=2"' in response.content.decode()
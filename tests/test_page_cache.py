@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def _post_urls(post):
+    return (
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+        f"/posts/{post.id}/",
+    )
+
+
+@pytest.mark.django_db
+def test_anonymous_pages_are_cached(client, post_with_published_location):
+    for url in _post_urls(post_with_published_location):
+        first = client.get(url)
+        assert first.status_code == HTTPStatus.OK
+        with CaptureQueriesContext(connection) as queries:
+            second = client.get(url)
+        assert second.content == first.content
+        assert not len(queries), (
+            f"Убедитесь, что повторный анонимный запрос `{url}` отдаётся из"
+            " кэша без запросов к базе данных."
+        )
+        assert "csrfmiddlewaretoken" not in second.content.decode()
+
+
+@pytest.mark.django_db
+def test_cache_is_not_used_for_authenticated(
+    user_client, post_with_published_location
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    user_client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get(url)
+    assert len(queries)
+    assert "csrfmiddlewaretoken" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_cache_invalidated_on_changes(
+    mixer, client, post_with_published_location
+):
+    post = post_with_published_location
+    for url in _post_urls(post):
+        client.get(url)
+
+    post.title = "Изменённый заголовок"
+    post.save()
+    for url in _post_urls(post):
+        assert post.title in client.get(url).content.decode(), (
+            "Убедитесь, что изменение публикации сбрасывает кэш страниц."
+        )
+
+    post.category.is_published = False
+    post.category.save()
+    assert post.title not in client.get("/").content.decode(), (
+        "Убедитесь, что снятие категории с публикации сбрасывает кэш."
+    )
+
+    post.category.is_published = True
+    post.category.save()
+    client.get(f"/posts/{post.id}/")
+    mixer.blend("blog.Comment", post=post, text="Новый комментарий")
+    assert "Новый комментарий" in client.get(
+        f"/posts/{post.id}/"
+    ).content.decode()
@@ -0,0 +1,73 @@
+import re
+from contextlib import contextmanager
+
+import pytest
+from django.test.signals import template_rendered
+
+from conftest import N_PER_PAGE
+
+CARD_TEMPLATE = "includes/post_card.html"
+ARTICLE = re.compile(r"<article.*?</article>", re.S)
+
+
+@contextmanager
+def count_card_renders():
+    rendered = []
+
+    def receiver(sender, template, context, **kwargs):
+        if template.name == CARD_TEMPLATE:
+            rendered.append(context["post"].pk)
+
+    template_rendered.connect(receiver)
+    try:
+        yield rendered
+    finally:
+        template_rendered.disconnect(receiver)
+
+
+@pytest.fixture(autouse=True)
+def enable_card_cache(settings):
+    settings.BLOG_CARD_CACHE_TIMEOUT = 60
+
+
+@pytest.mark.django_db
+def test_cards_rendered_once_and_shared_between_feeds(
+    user_client, user, many_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    with count_card_renders() as rendered:
+        first = user_client.get("/").content.decode()
+    assert len(rendered) == N_PER_PAGE
+
+    with count_card_renders() as rendered:
+        second = user_client.get("/").content.decode()
+        user_client.get(f"/profile/{user.username}/")
+        user_client.get(f"/category/{posts[0].category.slug}/")
+    assert rendered == [], (
+        "Убедитесь, что карточки публикаций берутся из кэша на всех лентах."
+    )
+    assert ARTICLE.findall(first) == ARTICLE.findall(second), (
+        "Убедитесь, что карточки из кэша совпадают с отрисованными."
+    )
+
+
+@pytest.mark.django_db
+def test_change_invalidates_only_affected_cards(
+    mixer, user, user_client, many_posts_with_published_locations
+):
+    post = user_client.get("/").context["page_obj"][0]
+    mixer.blend("blog.Comment", post=post, author=user)
+    with count_card_renders() as rendered:
+        response = user_client.get("/")
+    assert rendered == [post.pk], (
+        "Убедитесь, что новый комментарий перерисовывает только карточку"
+        " своей публикации."
+    )
+    assert "Комментарии (1)" in response.content.decode()
+
+    post.category.title = "Новое название"
+    post.category.save()
+    with count_card_renders() as rendered:
+        response = user_client.get("/")
+    assert len(rendered) == N_PER_PAGE
+    assert "Новое название" in response.content.decode()
@@ -0,0 +1,131 @@
+from io import BytesIO, StringIO
+
+import pytest
+from PIL import Image
+from django.core.files.images import ImageFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+
+from blog.images import variant_name
+from blog.models import Post
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.BLOG_IMAGE_VARIANTS_ASYNC = False
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+
+
+def _image_file(size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color=(73, 109, 137)).save(buffer, "JPEG")
+    return ImageFile(buffer, name="large.jpg")
+
+
+@pytest.mark.django_db
+def test_variants_built_after_commit(
+    mixer, user_client, user, published_category,
+    django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        post = mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            is_published=True, image=_image_file()
+        )
+    post.refresh_from_db()
+    assert post.has_thumbnails, (
+        "Убедитесь, что после сохранения публикации строятся уменьшенные"
+        " копии изображения."
+    )
+    assert post.image_variants["width"] == 1200
+    assert post.image_variants["height"] == 800
+    for width in (320, 640, 960):
+        for extension in ("jpg", "webp"):
+            name = variant_name(post.image.name, width, extension)
+            assert default_storage.exists(name)
+            with default_storage.open(name) as file:
+                assert Image.open(file).width == width
+
+    content = user_client.get("/").content.decode()
+    assert 'type="image/webp"' in content
+    assert "320w" in content and "1200w" in content
+    assert 'loading="lazy"' in content
+    assert 'width="1200" height="800"' in content
+
+
+@pytest.mark.django_db
+def test_backfill_command(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        image=_image_file((500, 500))
+    )
+    assert not Post.objects.get(pk=post.pk).has_thumbnails
+    out = StringIO()
+    call_command("backfill_post_images", stdout=out)
+    assert "Обработано изображений: 1" in out.getvalue()
+    post.refresh_from_db()
+    assert post.has_thumbnails
+    assert default_storage.exists(variant_name(post.image.name, 320, "webp"))
+    assert not default_storage.exists(
+        variant_name(post.image.name, 640, "webp")
+    )
+
+
+def _png_file(size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new("RGBA", size).save(buffer, "PNG")
+    return ImageFile(buffer, name="large.png")
+
+
+@pytest.mark.django_db
+def test_variants_of_same_stem_do_not_clash(
+    mixer, user, published_category, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        jpeg, png = (
+            mixer.blend(
+                "blog.Post", author=user, category=published_category,
+                image=image
+            )
+            for image in (_image_file(), _png_file())
+        )
+    jpeg_name, png_name = (
+        Post.objects.get(pk=post.pk).image.name for post in (jpeg, png)
+    )
+    assert (
+        variant_name(jpeg_name, 320, "webp")
+        != variant_name(png_name, 320, "webp")
+    ), "Убедитесь, что копии a.jpg и a.png не совпадают по имени."
+    for name in (jpeg_name, png_name):
+        assert default_storage.exists(variant_name(name, 320, "webp"))
+
+
+@pytest.mark.django_db
+def test_variants_removed_with_image(
+    mixer, user, published_category, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        post = mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            image=_image_file()
+        )
+    post = Post.objects.get(pk=post.pk)
+    old_variant = variant_name(post.image.name, 320, "webp")
+    assert default_storage.exists(old_variant)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        post.image = _image_file((700, 700))
+        post.save()
+    assert not default_storage.exists(old_variant), (
+        "Убедитесь, что копии заменённого изображения удаляются."
+    )
+    post = Post.objects.get(pk=post.pk)
+    new_variant = variant_name(post.image.name, 320, "webp")
+    assert default_storage.exists(new_variant)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        post.delete()
+    assert not default_storage.exists(new_variant), (
+        "Убедитесь, что копии изображения удаляются вместе с публикацией."
+    )
@@ -0,0 +1,58 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+
+pytestmark = pytest.mark.usefixtures("disable_page_cache")
+
+
+def _hide(post, state):
+    if state == "unpublished":
+        post.is_published = False
+    elif state == "future":
+        post.pub_date = timezone.now() + timedelta(days=1)
+    elif state == "hidden category":
+        post.category.is_published = False
+        post.category.save()
+    elif state == "no category":
+        post.category = None
+    post.save()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "state", ("unpublished", "future", "hidden category", "no category")
+)
+def test_hidden_post_visible_only_to_author(
+    state, post_with_published_location, user_client, another_user_client,
+    unlogged_client, django_assert_num_queries
+):
+    post = post_with_published_location
+    _hide(post, state)
+    url = f"/posts/{post.id}/"
+    assert user_client.get(url).status_code == HTTPStatus.OK, (
+        "Убедитесь, что автор видит свою скрытую публикацию."
+    )
+    assert another_user_client.get(url).status_code == HTTPStatus.NOT_FOUND
+    # Публикация проверяется на уже загруженном объекте, без второго запроса
+    with django_assert_num_queries(1):
+        response = unlogged_client.get(url)
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что скрытая публикация недоступна другим пользователям."
+    )
+
+
+@pytest.mark.django_db
+def test_unpublish_with_update_fields_hides_post(
+    post_with_published_location, unlogged_client
+):
+    post = post_with_published_location
+    assert list(unlogged_client.get("/").context["page_obj"]) == [post]
+    post.is_published = False
+    post.save(update_fields=["is_published"])
+    assert list(unlogged_client.get("/").context["page_obj"]) == [], (
+        "Убедитесь, что публикация, снятая с публикации сохранением с"
+        " update_fields, пропадает из ленты."
+    )
@@ -0,0 +1,31 @@
+import pytest
+
+from conftest import N_PER_PAGE
+
+pytestmark = pytest.mark.usefixtures("known_publication_schedule")
+
+# Сессия и пользователь запроса, профиль, COUNT для пагинатора, страница
+OWNER_QUERIES = 5
+# Анонимному читателю не нужны сессия и пользователь запроса
+ANONYMOUS_QUERIES = 3
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "client_fixture, expected",
+    (
+        ("user_client", OWNER_QUERIES),
+        ("another_user_client", OWNER_QUERIES),
+        ("unlogged_client", ANONYMOUS_QUERIES),
+    ),
+)
+def test_profile_query_count(
+    request, django_assert_num_queries, user,
+    many_posts_with_published_locations, client_fixture, expected
+):
+    assert len(many_posts_with_published_locations) > N_PER_PAGE
+    page_client = request.getfixturevalue(client_fixture)
+    with django_assert_num_queries(expected):
+        response = page_client.get(f"/profile/{user.username}/?page=2")
+    assert response.context["profile"] == user
+    assert len(response.context["page_obj"]) <= N_PER_PAGE
@@ -0,0 +1,117 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from conftest import N_PER_PAGE
+from fixtures.queries import QueryBudgetExceeded, assert_query_budget
+
+pytestmark = pytest.mark.usefixtures(
+    "disable_page_cache", "known_publication_schedule"
+)
+
+# Одинаковые бюджеты для маленькой и большой базы: число запросов
+# страницы не должно зависеть от числа публикаций и комментариев
+SIZES = {"small": (1, 1), "large": (N_PER_PAGE * 3, 60)}
+ANONYMOUS_PAGES = (
+    "index", "category_posts", "profile", "post_detail", "post_comments"
+)
+
+
+@pytest.fixture(params=SIZES.keys())
+def dataset(request, mixer, user, published_category, published_location):
+    posts_count, comments_count = SIZES[request.param]
+    posts = mixer.cycle(posts_count).blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        category=published_category,
+        location=published_location,
+    )
+    mixer.cycle(comments_count).blend(
+        "blog.Comment", post=posts[0], author=user
+    )
+    return posts[0], posts[0].comments.first()
+
+
+def _urls(post, comment, user):
+    return {
+        "index": reverse("blog:index"),
+        "category_posts": reverse(
+            "blog:category_posts", args=[post.category.slug]
+        ),
+        "profile": reverse("blog:profile", args=[user.username]),
+        "post_detail": reverse("blog:post_detail", args=[post.id]),
+        "post_comments": reverse("blog:post_comments", args=[post.id]),
+        "create_post": reverse("blog:create_post"),
+        "edit_post": reverse("blog:edit_post", args=[post.id]),
+        "delete_post": reverse("blog:delete_post", args=[post.id]),
+        "edit_profile": reverse("blog:edit_profile"),
+        "add_comment": reverse("blog:add_comment", args=[post.id]),
+        "edit_comment": reverse(
+            "blog:edit_comment", args=[post.id, comment.id]
+        ),
+        "delete_comment": reverse(
+            "blog:delete_comment", args=[post.id, comment.id]
+        ),
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.query_budget(
+    index=4,
+    category_posts=5,
+    profile=5,
+    post_detail=4,
+    post_comments=4,
+    create_post=4,
+    edit_post=5,
+    delete_post=3,
+    edit_profile=2,
+    add_comment=2,
+    edit_comment=3,
+    delete_comment=3,
+)
+def test_views_within_query_budget(user_client, user, dataset, query_budget):
+    post, comment = dataset
+    urls = _urls(post, comment, user)
+    for name, url in urls.items():
+        response = user_client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f"Убедитесь, что страница `{name}` доступна автору."
+        )
+    assert set(query_budget) == set(urls), (
+        "Убедитесь, что бюджет запросов проверен для каждой страницы."
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.query_budget(
+    index=2, category_posts=3, profile=3, post_detail=2, post_comments=2
+)
+def test_anonymous_views_within_query_budget(
+    client, user, dataset, query_budget
+):
+    post, comment = dataset
+    urls = _urls(post, comment, user)
+    for name in ANONYMOUS_PAGES:
+        assert client.get(urls[name]).status_code == HTTPStatus.OK
+    assert set(query_budget) == set(ANONYMOUS_PAGES)
+
+
+@pytest.mark.django_db
+def test_budget_failure_shows_diff(user):
+    with pytest.raises(QueryBudgetExceeded) as error:
+        with assert_query_budget(1, "проверка"):
+            for _ in range(3):
+                type(user).objects.filter(pk=user.pk).exists()
+    message = str(error.value)
+    assert "3 SQL-запросов при бюджете 1" in message
+    assert "--- бюджет: 1\n+++ выполнено: 3 (+2)" in message
+    assert "   1. SELECT" in message and "+  3. SELECT" in message, (
+        "Убедитесь, что запросы сверх бюджета отмечены в сообщении."
+    )
+    assert "[повтор №1]" in message
+    assert "×3:" in message, (
+        "Убедитесь, что одинаковые запросы сгруппированы в сообщении."
+    )
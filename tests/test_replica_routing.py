@@ -0,0 +1,131 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connections
+
+from blog.cache import CHANGED_AT_KEY, get_page_cache
+from blog.models import Post
+from blogicum.routers import (
+    ReplicaRouter, enable_replica_reads, reset_replica_reads
+)
+
+
+@pytest.fixture
+def replica(tmp_path, settings):
+    """Вторая база SQLite в файле: пустая «отстающая» реплика"""
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+    connections.settings["replica"] = connections.configure_settings({
+        "default": connections.settings["default"],
+        "replica": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": str(tmp_path / "replica.sqlite3"),
+        },
+    })["replica"]
+    call_command("migrate", database="replica", verbosity=0)
+    settings.DATABASE_REPLICAS = ["replica"]
+    yield "replica"
+    connections["replica"].close()
+    del connections["replica"]
+    del connections.settings["replica"]
+
+
+def test_router_reads_replicas_only_when_enabled(settings):
+    settings.DATABASE_REPLICAS = ["replica"]
+    router = ReplicaRouter()
+    assert router.db_for_read(Post) is None
+    token = enable_replica_reads()
+    try:
+        assert router.db_for_read(Post) == "replica"
+        assert router.db_for_read(Session) is None, (
+            "Убедитесь, что сессии всегда читаются с основной базы."
+        )
+    finally:
+        reset_replica_reads(token)
+    assert router.db_for_write(Post) == "default"
+
+
+@pytest.mark.django_db
+def test_read_views_use_replica(
+    replica, post_with_published_location, another_user_client
+):
+    # Реплика ещё не получила публикацию: читатели её не видят
+    url = f"/posts/{post_with_published_location.id}/"
+    assert another_user_client.get(url).status_code == HTTPStatus.OK, (
+        "Убедитесь, что публикация, отсутствующая на реплике, читается"
+        " с основной базы."
+    )
+    response = another_user_client.get("/")
+    assert len(response.context["page_obj"]) == 0, (
+        "Убедитесь, что лента читается с реплики."
+    )
+
+
+@pytest.mark.django_db
+def test_author_and_writer_read_primary(
+    replica, post_with_published_location, user_client, unlogged_client
+):
+    post = post_with_published_location
+    # Реплика получила публикацию до того, как автор её изменил
+    for obj in (post.author, post.category, post.location, post):
+        type(obj).objects.using(replica).bulk_create([obj])
+    Post.objects.filter(pk=post.pk).update(title="Новый заголовок")
+    stale = unlogged_client.get(f"/posts/{post.id}/")
+    assert stale.context["post"].title == post.title
+
+    response = user_client.get(f"/posts/{post.id}/")
+    assert response.context["post"].title == "Новый заголовок", (
+        "Убедитесь, что автор видит актуальную версию своей публикации,"
+        " даже если реплика отстаёт."
+    )
+    profile = user_client.get(f"/profile/{post.author.username}/")
+    assert [item.title for item in profile.context["page_obj"]] == [
+        "Новый заголовок"
+    ]
+
+    response = user_client.post(
+        f"/posts/{post.id}/comment/", {"text": "Комментарий"}
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    assert "primary_db" in response.cookies, (
+        "Убедитесь, что после записи клиент закрепляется за основной базой."
+    )
+    feed = user_client.get("/")
+    assert [item.title for item in feed.context["page_obj"]] == [
+        "Новый заголовок"
+    ], "Убедитесь, что после записи лента читается с основной базы."
+
+
+@pytest.mark.django_db
+def test_lagging_replica_does_not_fill_cache(
+    replica, settings, post_with_published_location, unlogged_client
+):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 60
+    post = post_with_published_location
+    api_url = "/api/posts/"
+    # Публикация только что создана и ещё не дошла до реплики
+    assert len(unlogged_client.get("/").context["page_obj"]) == 0
+    assert unlogged_client.get(api_url).json()["results"] == []
+
+    for obj in (post.author, post.category, post.location, post):
+        type(obj).objects.using(replica).bulk_create([obj])
+    response = unlogged_client.get("/")
+    assert response.context is not None, (
+        "Убедитесь, что страница, прочитанная с реплики сразу после"
+        " изменения данных, не сохраняется в кэше."
+    )
+    assert len(response.context["page_obj"]) == 1
+    assert len(unlogged_client.get(api_url).json()["results"]) == 1, (
+        "Убедитесь, что ответ API, прочитанный с реплики сразу после"
+        " изменения данных, не сохраняется в кэше."
+    )
+
+    # Окно отставания реплики прошло: страницы снова кэшируются
+    get_page_cache().set(CHANGED_AT_KEY, time.time() - 60, None)
+    unlogged_client.get("/")
+    Post.objects.using(replica).update(is_visible=False)
+    assert unlogged_client.get("/").context is None, (
+        "Убедитесь, что после окна отставания реплики страницы кэшируются."
+    )
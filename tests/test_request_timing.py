@@ -0,0 +1,51 @@
+import logging
+import re
+
+import pytest
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+SERVER_TIMING = re.compile(
+    r'db;dur=[\d.]+;desc="(\d+) SQL", tpl;dur=[\d.]+, view;dur=[\d.]+, '
+    r"total;dur=[\d.]+"
+)
+
+
+@pytest.mark.django_db
+def test_server_timing_header(client, post_with_published_location):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/")
+    match = SERVER_TIMING.search(response.get("Server-Timing", ""))
+    assert match, (
+        "Убедитесь, что ответ содержит заголовок Server-Timing с метриками"
+        " db, tpl, view и total."
+    )
+    assert int(match.group(1)) == len(queries)
+
+
+@pytest.mark.django_db
+def test_budget_exceeded_is_logged(client, caplog):
+    budgets = {"blog:index": {"queries": 0}}
+    with override_settings(REQUEST_TIMING_BUDGETS=budgets):
+        with caplog.at_level(logging.DEBUG, logger="blogicum.timing"):
+            client.get("/")
+    records = [r for r in caplog.records if r.name == "blogicum.timing"]
+    assert any(r.levelno == logging.DEBUG and r.timing["view"] == "blog:index"
+               for r in records)
+    assert any(
+        r.levelno == logging.WARNING and r.exceeded == ["queries"]
+        for r in records
+    ), "Убедитесь, что превышение бюджета запросов логируется."
+
+
+@pytest.mark.django_db
+def test_requests_within_budget_are_not_logged(client, caplog):
+    budgets = {"blog:index": {"queries": 100}}
+    with override_settings(REQUEST_TIMING_BUDGETS=budgets):
+        with caplog.at_level(logging.INFO, logger="blogicum.timing"):
+            client.get("/")
+    assert not [r for r in caplog.records if r.name == "blogicum.timing"], (
+        "Убедитесь, что запрос в пределах бюджета не пишет строку в лог"
+        " blogicum.timing на уровне INFO."
+    )
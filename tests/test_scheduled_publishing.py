@@ -0,0 +1,100 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Post
+
+
+@pytest.fixture
+def scheduled_post(mixer, user, published_category, published_location):
+    return mixer.blend(
+        "blog.Post", author=user, is_published=True,
+        category=published_category, location=published_location,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+
+
+def feed_ids(client, url="/"):
+    return [post.id for post in client.get(url).context["page_obj"]]
+
+
+@pytest.mark.django_db
+def test_scheduled_post_goes_live_on_first_request(
+    monkeypatch, client, scheduled_post, post_with_published_location
+):
+    assert not scheduled_post.is_visible
+    assert post_with_published_location.is_visible
+    assert feed_ids(client) == [post_with_published_location.id]
+    # Повторный запрос отдаётся из кэша страниц
+    assert client.get("/").context is None
+
+    later = timezone.now() + timedelta(hours=2)
+    monkeypatch.setattr(timezone, "now", lambda: later)
+    assert feed_ids(client) == [
+        scheduled_post.id, post_with_published_location.id
+    ], (
+        "Убедитесь, что отложенная публикация появляется в ленте первым"
+        " запросом после наступления её даты, минуя кэш страниц."
+    )
+    scheduled_post.refresh_from_db()
+    assert scheduled_post.is_visible
+
+
+@pytest.mark.django_db
+def test_category_toggle_updates_visibility(
+    client, settings, post_with_published_location
+):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+    category = post_with_published_location.category
+    category.is_published = False
+    category.save()
+    assert not Post.objects.filter(is_visible=True).exists(), (
+        "Убедитесь, что скрытие категории скрывает её публикации."
+    )
+    category.is_published = True
+    category.save()
+    assert feed_ids(client) == [post_with_published_location.id]
+
+    category.delete()
+    assert not Post.objects.filter(is_visible=True).exists()
+
+
+@pytest.mark.django_db
+def test_publish_scheduled_command(
+    settings, client, scheduled_post, post_with_published_location
+):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+    Post.objects.update(is_visible=False)
+    stdout = StringIO()
+    call_command("publish_scheduled", full=True, stdout=stdout)
+    assert "Видимость изменена у публикаций: 1" in stdout.getvalue()
+    assert "Следующая отложенная публикация" in stdout.getvalue()
+    assert feed_ids(client) == [post_with_published_location.id]
+
+    Post.objects.filter(pk=scheduled_post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+    stdout = StringIO()
+    call_command("publish_scheduled", stdout=stdout)
+    assert "Показано публикаций: 1" in stdout.getvalue()
+    assert "Отложенных публикаций нет" in stdout.getvalue()
+    assert len(feed_ids(client)) == 2
+
+
+@pytest.mark.django_db
+def test_scheduled_post_goes_live_after_cache_loss(
+    monkeypatch, settings, client, scheduled_post
+):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+    for cache in caches.all():
+        cache.clear()
+    later = timezone.now() + timedelta(hours=2)
+    monkeypatch.setattr(timezone, "now", lambda: later)
+    assert feed_ids(client) == [scheduled_post.id], (
+        "Убедитесь, что отложенная публикация появляется в ленте, даже"
+        " если время её показа пропало из кэша."
+    )
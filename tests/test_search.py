@@ -0,0 +1,77 @@
+import pytest
+
+from blog import search
+from conftest import N_PER_PAGE
+
+
+@pytest.fixture(params=("fts5", "terms"))
+def backend(request, monkeypatch, settings):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+    if request.param == "terms":
+        monkeypatch.setattr(search, "_fts_tables", {"default": set()})
+    elif not search.has_fts():
+        pytest.skip("SQLite собран без FTS5")
+    return request.param
+
+
+@pytest.fixture
+def dragon_posts(mixer, user, published_category, published_location):
+    def blend(title, text, **kwargs):
+        return mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            location=published_location, title=title, text=text, **kwargs
+        )
+
+    return (
+        blend("Дракон над городом", "Вечером видели зарево."),
+        blend("Прогулка", "Говорят, в горах живёт дракон, и не один."),
+        blend("Дракон-черновик", "Скрытый текст про дракона.",
+              is_published=False),
+        blend("Котики", "Ничего про ящеров."),
+    )
+
+
+def found(client, query):
+    response = client.get("/search/", {"q": query})
+    return [post.id for post in response.context["page_obj"]]
+
+
+@pytest.mark.django_db
+def test_search_ranks_visible_posts(backend, client, dragon_posts):
+    titled, mentioned, hidden, _ = dragon_posts
+    assert found(client, "ДРАКОН") == [titled.id, mentioned.id], (
+        "Убедитесь, что поиск находит публикации по заголовку и тексту,"
+        " ставит совпадения в заголовке выше и скрывает неопубликованные."
+    )
+    assert found(client, "дракон горах") == [mentioned.id]
+    assert found(client, "") == []
+    assert found(client, "\"OR*") == []
+
+
+@pytest.mark.django_db
+def test_search_index_is_incremental(backend, client, dragon_posts):
+    titled, mentioned, _, other = dragon_posts
+    mentioned.text = "Говорят, в горах никого нет."
+    mentioned.save()
+    other.title = "Котики и дракон"
+    other.save()
+    titled.delete()
+    assert found(client, "дракон") == [other.id], (
+        "Убедитесь, что поисковый индекс обновляется при сохранении и"
+        " удалении публикаций."
+    )
+
+
+@pytest.mark.django_db
+def test_search_pagination_keeps_query(
+    client, settings, user, many_posts_with_published_locations
+):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+    for post in many_posts_with_published_locations:
+        post.title = "Общий заголовок"
+        post.save()
+    response = client.get("/search/", {"q": "общий"})
+    assert response.context["paginator"].count == N_PER_PAGE * 2
+    assert 'href="?q=%D0%BE%D0%B1%D1%89%D0%B8%D0%B9&amp;page=2"' in (
+        response.content.decode()
+    ), "Убедитесь, что ссылки пагинатора сохраняют поисковый запрос."
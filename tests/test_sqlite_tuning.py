@@ -0,0 +1,57 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from django.db import connection
+
+from blogicum.sqlite import apply_pragmas
+
+MANAGE_DIR = Path(__file__).resolve().parent.parent / "blogicum"
+
+
+def _pragma(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+def test_pragmas_applied_on_connection(settings):
+    old_cache_size = _pragma("cache_size")
+    settings.SQLITE_PRAGMAS = {"cache_size": -1234, "busy_timeout": 1500}
+    try:
+        apply_pragmas(sender=type(connection), connection=connection)
+        assert _pragma("cache_size") == -1234, (
+            "Убедитесь, что PRAGMA из SQLITE_PRAGMAS выполняются при"
+            " открытии соединения."
+        )
+        assert _pragma("busy_timeout") == 1500
+    finally:
+        settings.SQLITE_PRAGMAS = {"cache_size": old_cache_size}
+        apply_pragmas(sender=type(connection), connection=connection)
+
+
+def test_stress_command_compares_profiles(tmp_path):
+    # Общая база в памяти тестов не поддерживает busy_timeout, поэтому
+    # команда запускается отдельным процессом на временных файлах
+    output = tmp_path / "stress.json"
+    completed = subprocess.run(
+        [sys.executable, "manage.py", "stress_sqlite", "--writers", "2",
+         "--readers", "2", "--requests", "6", "--output", str(output)],
+        cwd=MANAGE_DIR, capture_output=True, text=True, timeout=300,
+    )
+    assert completed.returncode == 0, completed.stderr
+    results = json.loads(output.read_text(encoding="utf-8"))
+    assert results["tuned"]["journal_mode"] == "wal", (
+        "Убедитесь, что рабочий профиль включает режим WAL."
+    )
+    assert results["default"]["journal_mode"] != "wal"
+    for profile in ("default", "tuned"):
+        assert results[profile]["writes"] == 2 * 6
+        assert results[profile]["errors"] == 0
+    assert results["tuned"]["lock_errors"] == 0, (
+        "Убедитесь, что параллельная запись публикаций и комментариев"
+        " не приводит к ошибкам блокировки базы."
+    )
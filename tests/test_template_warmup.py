@@ -0,0 +1,37 @@
+import importlib
+from pathlib import Path
+
+from django.conf import settings
+from django.template import engines
+from django.test import override_settings
+
+from benchmarks.harness import template_settings
+from blogicum.warmup import template_names, warm_templates
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "blogicum/templates"
+
+
+def test_production_uses_cached_loader():
+    production = importlib.import_module("blogicum.settings_production")
+    loaders = production.TEMPLATES[0]["OPTIONS"]["loaders"]
+    assert loaders[0][0] == "django.template.loaders.cached.Loader", (
+        "Убедитесь, что рабочий профиль использует кэширующий загрузчик"
+        " шаблонов."
+    )
+    assert production.TEMPLATE_WARMUP
+    assert "loaders" not in settings.TEMPLATES[0]["OPTIONS"], (
+        "Убедитесь, что рабочий профиль не меняет настройки разработки."
+    )
+
+
+def test_warm_templates_fills_loader_cache():
+    names = template_names(TEMPLATES_DIR)
+    assert "base.html" in names and "includes/post_card.html" in names
+    with override_settings(
+        TEMPLATES=template_settings(settings.TEMPLATES, cached=True)
+    ):
+        assert warm_templates() == len(names)
+        cached_loader = engines["django"].engine.template_loaders[0]
+        assert set(names) <= set(cached_loader.get_template_cache), (
+            "Убедитесь, что прогрев загружает все шаблоны из templates/."
+        )